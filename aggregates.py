@@ -0,0 +1,272 @@
+"""Materialized bias and ticker time series.
+
+Tables, all keyed by the day a tweet was posted and its handle:
+- bias_counts:     (day, user, bias) -> tweets
+- ticker_mentions: (day, user, symbol, bias) -> tweets mentioning the symbol
+- ticker_pairs:    (day, user, symbol_a, symbol_b) -> tweets mentioning both
+
+They live in a small SQLite file (``AGGREGATES_DB``) and are updated
+incrementally: snapshot files already ingested are skipped, and each tweet is
+counted once no matter how many snapshots it appears in. Queries read only the
+materialized tables, never the raw tweets.
+"""
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import archive
+import codec
+import tickers
+
+# Derived from data/ and rebuilt on demand, so it lives with the other caches
+# rather than in the committed archive.
+AGGREGATES_DB = os.getenv("AGGREGATES_DB", ".cache/aggregates.sqlite")
+
+SCHEMA_VERSION = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bias_counts (
+    day   TEXT NOT NULL,
+    user  TEXT NOT NULL,
+    bias  TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, user, bias)
+);
+CREATE INDEX IF NOT EXISTS bias_counts_bias_day ON bias_counts (bias, day);
+CREATE TABLE IF NOT EXISTS ticker_mentions (
+    day    TEXT NOT NULL,
+    user   TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    bias   TEXT NOT NULL,
+    count  INTEGER NOT NULL,
+    PRIMARY KEY (symbol, day, user, bias)
+);
+CREATE TABLE IF NOT EXISTS ticker_pairs (
+    day      TEXT NOT NULL,
+    user     TEXT NOT NULL,
+    symbol_a TEXT NOT NULL,
+    symbol_b TEXT NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (symbol_a, symbol_b, day, user)
+);
+CREATE INDEX IF NOT EXISTS ticker_pairs_b ON ticker_pairs (symbol_b, day);
+CREATE TABLE IF NOT EXISTS seen_tweets (key TEXT PRIMARY KEY) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingested_files (name TEXT PRIMARY KEY, stamp TEXT NOT NULL);
+"""
+
+
+def has_stable_id(tweet_id) -> bool:
+    """Real tweet ids are numeric; ``temp_``/``unknown_`` ids are per-run only."""
+    return str(tweet_id or "").isdigit()
+
+
+def tweet_key(tweet_id, user, text):
+    """Stable identity for a tweet; id-less records fall back to user + text."""
+    if has_stable_id(tweet_id):
+        return str(tweet_id)
+    return f"{user}\x1f{text}"
+
+
+def tweet_day(tweet_id, fallback_day):
+    created = archive.snowflake_time(tweet_id)
+    return created.strftime("%Y-%m-%d") if created else fallback_day
+
+
+class BiasTimeSeries:
+    """Incrementally maintained bias counts per user per day."""
+
+    def __init__(self, path=AGGREGATES_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Older layout: rebuild from the archive on the next update().
+            for (table,) in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- ingestion ----------
+    def _add(self, rows):
+        """rows: iterable of (key, day, user, bias, symbols). Returns the number of new tweets."""
+        added = 0
+        cur = self.conn.cursor()
+        for key, day, user, bias, symbols in rows:
+            cur.execute("INSERT OR IGNORE INTO seen_tweets (key) VALUES (?)", (key,))
+            if cur.rowcount == 0:
+                continue
+            bias = bias or "None"
+            cur.execute(
+                "INSERT INTO bias_counts (day, user, bias, count) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT (day, user, bias) DO UPDATE SET count = count + 1",
+                (day, user, bias),
+            )
+            symbols = sorted(set(symbols))
+            cur.executemany(
+                "INSERT INTO ticker_mentions (day, user, symbol, bias, count) VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (symbol, day, user, bias) DO UPDATE SET count = count + 1",
+                ((day, user, symbol, bias) for symbol in symbols),
+            )
+            cur.executemany(
+                "INSERT INTO ticker_pairs (day, user, symbol_a, symbol_b, count) VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT (symbol_a, symbol_b, day, user) DO UPDATE SET count = count + 1",
+                ((day, user, a, b) for i, a in enumerate(symbols) for b in symbols[i + 1:]),
+            )
+            added += 1
+        return added
+
+    @staticmethod
+    def _row(tweet, fallback_day):
+        tweet_id = tweet.get("id")
+        symbols = tweet.get("tickers")
+        if symbols is None:  # snapshots written before tickers were stored
+            symbols = tickers.extract_tickers(tweet.get("text", ""))
+        return (tweet_key(tweet_id, tweet["user"], tweet.get("text", "")),
+                tweet_day(tweet_id, fallback_day), tweet["user"], tweet.get("bias"), symbols)
+
+    def update(self, reader=None):
+        """Ingest every archive file not seen before. Returns the number of new tweets."""
+        reader = reader or archive.ArchiveReader()
+        known = dict(self.conn.execute("SELECT name, stamp FROM ingested_files"))
+        added = 0
+        for index in reader.indexes():
+            name = os.path.basename(index.path)
+            stamp = "%d-%s" % tuple(archive.file_stamp(index.path))
+            if known.get(name) == stamp:
+                continue
+            # Id-less tweets have no posting time; they count on the day of the
+            # snapshot they came from, which segments keep per record.
+            days = reader.record_days(index)
+            with archive.open_mapped(index.path) as buf:
+                rows = [self._row(codec.loads(buf[start:end]), day)
+                        for (start, end, *_), day in zip(index.entries, days)]
+            with self.conn:
+                added += self._add(rows)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files (name, stamp) VALUES (?, ?)", (name, stamp)
+                )
+        return added
+
+    # ---------- queries ----------
+    def counts(self, user=None, bias=None, since=None, until=None):
+        """Rows of (day, user, bias, count), filtered and ordered by day."""
+        sql = "SELECT day, user, bias, count FROM bias_counts WHERE 1=1"
+        params = []
+        if user:
+            sql += " AND lower(ltrim(user, '@')) = ?"
+            params.append(archive.normalize_handle(user))
+        if bias:
+            sql += " AND bias = ?"
+            params.append(bias)
+        if since:
+            sql += " AND day >= ?"
+            params.append(str(since))
+        if until:
+            sql += " AND day <= ?"
+            params.append(str(until))
+        return self.conn.execute(sql + " ORDER BY day, user, bias", params).fetchall()
+
+    def trend(self, bias, user=None, days=30):
+        """Daily totals for ``bias`` over the last ``days`` days: [(day, count)]."""
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+        totals = {}
+        for day, _user, _bias, count in self.counts(user=user, bias=bias, since=since):
+            totals[day] = totals.get(day, 0) + count
+        return sorted(totals.items())
+
+    def distribution(self, user=None, since=None, until=None):
+        """Total tweets per bias: {bias: count}."""
+        totals = {}
+        for _day, _user, bias, count in self.counts(user=user, since=since, until=until):
+            totals[bias] = totals.get(bias, 0) + count
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+    def _since(self, days):
+        return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+
+    def ticker_bias_distribution(self, symbol, days=90, user=None):
+        """{bias: tweets} for tweets mentioning ``symbol`` in the last ``days`` days."""
+        sql = ("SELECT bias, SUM(count) FROM ticker_mentions WHERE symbol = ? AND day >= ?")
+        params = [symbol.lstrip("$").upper(), self._since(days)]
+        if user:
+            sql += " AND lower(ltrim(user, '@')) = ?"
+            params.append(archive.normalize_handle(user))
+        rows = self.conn.execute(sql + " GROUP BY bias ORDER BY SUM(count) DESC", params)
+        return dict(rows.fetchall())
+
+    def ticker_trend(self, symbol, days=90, user=None):
+        """Daily mention counts for ``symbol``: [(day, tweets)]."""
+        sql = "SELECT day, SUM(count) FROM ticker_mentions WHERE symbol = ? AND day >= ?"
+        params = [symbol.lstrip("$").upper(), self._since(days)]
+        if user:
+            sql += " AND lower(ltrim(user, '@')) = ?"
+            params.append(archive.normalize_handle(user))
+        return self.conn.execute(sql + " GROUP BY day ORDER BY day", params).fetchall()
+
+    def top_tickers(self, days=30, user=None, limit=20):
+        """Most mentioned symbols: [(symbol, tweets)]."""
+        sql = "SELECT symbol, SUM(count) FROM ticker_mentions WHERE day >= ?"
+        params = [self._since(days)]
+        if user:
+            sql += " AND lower(ltrim(user, '@')) = ?"
+            params.append(archive.normalize_handle(user))
+        sql += " GROUP BY symbol ORDER BY SUM(count) DESC LIMIT ?"
+        return self.conn.execute(sql, params + [limit]).fetchall()
+
+    def co_mentions(self, symbol, days=90, limit=20):
+        """Symbols most often mentioned alongside ``symbol``: [(other, tweets)]."""
+        symbol = symbol.lstrip("$").upper()
+        since = self._since(days)
+        rows = self.conn.execute(
+            "SELECT other, SUM(n) FROM ("
+            " SELECT symbol_b AS other, count AS n FROM ticker_pairs WHERE symbol_a = ? AND day >= ?"
+            " UNION ALL"
+            " SELECT symbol_a AS other, count AS n FROM ticker_pairs WHERE symbol_b = ? AND day >= ?"
+            ") GROUP BY other ORDER BY SUM(n) DESC LIMIT ?",
+            (symbol, since, symbol, since, limit),
+        )
+        return rows.fetchall()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain and query the bias time series.")
+    parser.add_argument("command", choices=["update", "trend", "distribution", "ticker", "top-tickers"])
+    parser.add_argument("--user")
+    parser.add_argument("--bias")
+    parser.add_argument("--symbol")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--db", default=AGGREGATES_DB)
+    args = parser.parse_args()
+
+    series = BiasTimeSeries(args.db)
+    if args.command == "update":
+        print(f"Ingested {series.update()} new tweets into {args.db}")
+    elif args.command == "trend":
+        if not args.bias:
+            parser.error("trend requires --bias")
+        for day, count in series.trend(args.bias, user=args.user, days=args.days):
+            print(f"{day}  {count}")
+    elif args.command == "distribution":
+        since = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime("%Y-%m-%d")
+        for bias, count in series.distribution(user=args.user, since=since).items():
+            print(f"{bias:<28} {count}")
+    elif args.command == "ticker":
+        if not args.symbol:
+            parser.error("ticker requires --symbol")
+        print(f"Bias distribution for ${args.symbol.lstrip('$').upper()} over {args.days} days:")
+        for bias, count in series.ticker_bias_distribution(args.symbol, args.days, args.user).items():
+            print(f"  {bias:<28} {count}")
+        print("Most often mentioned with:")
+        for other, count in series.co_mentions(args.symbol, args.days, limit=10):
+            print(f"  ${other:<10} {count}")
+    else:
+        for symbol, count in series.top_tickers(args.days, args.user):
+            print(f"${symbol:<10} {count}")
+    series.close()
@@ -0,0 +1,395 @@
+"""Lazy, memory-mapped reader over the snapshot archive in ``data/``.
+
+Each snapshot gets a small offset index (record boundaries plus id, user and
+bias) built once and cached under ``ARCHIVE_INDEX_DIR``. Scans consult the
+index first and only decode the records that match, so peak memory stays flat
+no matter how large the archive grows.
+
+Daily snapshots can be rolled into deduplicated, compressed monthly segments
+with ``compact_archive``. The manifest remembers the day of the snapshot each
+segment record came from. The reader spans segments and daily files alike.
+"""
+import glob
+import gzip
+import hashlib
+import mmap
+import os
+import re
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import codec
+
+try:
+    import zstandard
+except ImportError:  # segments fall back to gzip
+    zstandard = None
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data")
+ARCHIVE_INDEX_DIR = os.getenv("ARCHIVE_INDEX_DIR", ".cache/archive_index")
+# Dated snapshots plus the undated ``tweets_with_bias.json`` that a run
+# without OUTPUT_FILE writes.
+SNAPSHOT_GLOB = "tweets_with_bias*.json"
+SNAPSHOT_MONTH_REGEX = re.compile(r"tweets_with_bias_(\d{4}-\d{2})-\d{2}")
+SNAPSHOT_DAY_REGEX = re.compile(r"tweets(?:_with_bias)?_(\d{4}-\d{2}(?:-\d{2})?)")
+TWITTER_EPOCH_MS = 1288834974657
+SEGMENT_DIRNAME = "segments"
+MANIFEST_NAME = "manifest.json"
+ZSTD_LEVEL = 19
+INDEX_VERSION = 1
+
+# Strings (with escapes) and braces; everything else is irrelevant for finding
+# top-level record boundaries.
+_TOKEN_REGEX = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}]', re.DOTALL)
+
+
+def scan_record_offsets(buf):
+    """Yield (start, end) byte offsets of each top-level object in a JSON array."""
+    depth = 0
+    start = 0
+    for m in _TOKEN_REGEX.finditer(buf):
+        tok = m.group()
+        if tok == b"{":
+            if depth == 0:
+                start = m.start()
+            depth += 1
+        elif tok == b"}":
+            depth -= 1
+            if depth == 0:
+                yield start, m.end()
+
+
+def normalize_handle(handle: str) -> str:
+    return (handle or "").lstrip("@").lower()
+
+
+def file_stamp(path):
+    """[size, content digest] used to detect a changed file.
+
+    Not the mtime: a fresh checkout gives every file a new one.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return [os.path.getsize(path), digest.hexdigest()]
+
+
+def snowflake_time(tweet_id):
+    """Creation time encoded in a numeric tweet id, or None for temp/unknown ids."""
+    try:
+        ms = (int(tweet_id) >> 22) + TWITTER_EPOCH_MS
+    except (TypeError, ValueError):
+        return None
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def snapshot_day(path):
+    """Best-effort "YYYY-MM-DD" for a snapshot or segment file (segments map to day 01).
+
+    Undated files fall back to the day they were last written.
+    """
+    m = SNAPSHOT_DAY_REGEX.search(os.path.basename(path))
+    if not m:
+        return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).strftime("%Y-%m-%d")
+    day = m.group(1)
+    return day if len(day) == 10 else day + "-01"
+
+
+# ----------------------------
+# Per-file offset index
+# ----------------------------
+class SnapshotIndex:
+    """Offset index for one snapshot: a list of (start, end, id, user, bias)."""
+
+    def __init__(self, path, entries):
+        self.path = path
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _cache_path(path):
+        name = os.path.basename(path) + ".idx"
+        return os.path.join(ARCHIVE_INDEX_DIR, name)
+
+    @classmethod
+    def load(cls, path):
+        """Return the cached index for ``path``, building it if stale or missing."""
+        cache_path = cls._cache_path(path)
+        stamp = file_stamp(path)
+        if os.path.exists(cache_path):
+            try:
+                cached = codec.read_json(cache_path)
+                if cached.get("version") == INDEX_VERSION and cached.get("stamp") == stamp:
+                    return cls(path, [tuple(e) for e in cached["entries"]])
+            except Exception:
+                pass  # corrupt cache: rebuild below
+
+        index = cls.build(path)
+        os.makedirs(ARCHIVE_INDEX_DIR, exist_ok=True)
+        codec.write_json(
+            {"version": INDEX_VERSION, "stamp": stamp, "entries": index.entries},
+            cache_path, compact=True,
+        )
+        return index
+
+    @classmethod
+    def build(cls, path):
+        """Scan ``path`` once and record where every tweet lives."""
+        entries = []
+        with open_mapped(path) as buf:
+            for start, end in scan_record_offsets(buf):
+                rec = codec.loads(buf[start:end])
+                entries.append((start, end, str(rec.get("id", "")),
+                                rec.get("user", ""), rec.get("bias") or "None"))
+        return cls(path, entries)
+
+
+@contextmanager
+def open_mapped(path):
+    """Yield a read-only mmap of ``path`` (or b"" for empty files)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield buf
+
+
+# ----------------------------
+# Monthly segments
+# ----------------------------
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data)
+
+
+def _open_compressed(path, compression):
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
+
+
+def _dedupe_key(rec):
+    return rec.get("id") or (rec.get("user", ""), rec.get("text", ""))
+
+
+def snapshot_month(path):
+    """Return "YYYY-MM" for a daily snapshot file name, or None."""
+    m = SNAPSHOT_MONTH_REGEX.search(os.path.basename(path))
+    return m.group(1) if m else None
+
+
+class SegmentStore:
+    """Monthly compressed segments plus the manifest describing them."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.dir = os.path.join(root, SEGMENT_DIRNAME)
+        self.manifest_path = os.path.join(self.dir, MANIFEST_NAME)
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"segments": {}}
+        return codec.read_json(self.manifest_path)
+
+    def _save_manifest(self, manifest):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        codec.write_json(manifest, tmp)
+        os.replace(tmp, self.manifest_path)
+
+    def read_segment(self, month):
+        """Load every record of a segment into memory (used while compacting)."""
+        entry = self.manifest()["segments"].get(month)
+        if not entry:
+            return []
+        with _open_compressed(os.path.join(self.dir, entry["file"]), entry["compression"]) as f:
+            return codec.loads(f.read())
+
+    def record_days(self, month):
+        """Source snapshot day of each record of a segment, in record order.
+
+        Segments compacted before days were kept map every record to day 01.
+        """
+        entry = self.manifest()["segments"].get(month)
+        if not entry:
+            return []
+        if "days" not in entry:
+            return [month + "-01"] * entry["records"]
+        return [day for day, count in entry["days"] for _ in range(count)]
+
+    def write_segment(self, month, records, sources, days):
+        """Replace a month's segment; ``days`` holds each record's source day."""
+        compression = "zstd" if zstandard is not None else "gzip"
+        ext = ".json.zst" if compression == "zstd" else ".json.gz"
+        name = f"tweets_{month}{ext}"
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = os.path.join(self.dir, name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_compress(codec.dumps(records, compact=True), compression))
+        os.replace(tmp, os.path.join(self.dir, name))
+
+        manifest = self.manifest()
+        previous = manifest["segments"].get(month)
+        if previous and previous["file"] != name:
+            os.remove(os.path.join(self.dir, previous["file"]))
+        manifest["segments"][month] = {
+            "file": name,
+            "compression": compression,
+            "records": len(records),
+            "sources": sorted(set((previous or {}).get("sources", [])) | set(sources)),
+            "days": _runs(days),
+            "compacted_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._save_manifest(manifest)
+
+    def materialized_files(self):
+        """Decompress segments into the index cache and return their paths.
+
+        Decompressed copies are reused until the segment itself changes, so they
+        can be memory-mapped and indexed exactly like daily snapshots.
+        """
+        paths = []
+        out_dir = os.path.join(ARCHIVE_INDEX_DIR, SEGMENT_DIRNAME)
+        for month, entry in sorted(self.manifest()["segments"].items()):
+            src = os.path.join(self.dir, entry["file"])
+            dst = os.path.join(out_dir, f"tweets_{month}.json")
+            if not os.path.exists(dst) or os.path.getmtime(dst) < os.path.getmtime(src):
+                os.makedirs(out_dir, exist_ok=True)
+                with _open_compressed(src, entry["compression"]) as f_in, open(dst + ".tmp", "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+                os.replace(dst + ".tmp", dst)
+            paths.append(dst)
+        return paths
+
+
+def _runs(values):
+    """[[value, repeat], ...] for consecutive equal values."""
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+def compact_archive(root=ARCHIVE_DIR, include_current=False, keep_sources=False):
+    """Roll daily snapshots into one deduplicated, compressed segment per month.
+
+    The current UTC month is left alone unless ``include_current`` is set, since
+    it is still receiving daily files. Returns {month: record_count}.
+    """
+    current = datetime.now(timezone.utc).strftime("%Y-%m")
+    by_month = {}
+    for path in sorted(glob.glob(os.path.join(root, SNAPSHOT_GLOB))):
+        month = snapshot_month(path)
+        if month and (include_current or month < current):
+            by_month.setdefault(month, []).append(path)
+
+    store = SegmentStore(root)
+    written = {}
+    for month, paths in sorted(by_month.items()):
+        merged = {}
+        days = {}  # a record keeps the day of the first snapshot it appeared in
+        for rec, day in zip(store.read_segment(month), store.record_days(month)):
+            key = _dedupe_key(rec)
+            merged[key] = rec
+            days.setdefault(key, day)
+        for path in paths:  # chronological, so later snapshots win
+            day = snapshot_day(path)
+            for rec in codec.read_json(path):
+                key = _dedupe_key(rec)
+                merged[key] = rec
+                days.setdefault(key, day)
+        records = list(merged.values())
+        store.write_segment(month, records, [os.path.basename(p) for p in paths],
+                            [days[key] for key in merged])
+        written[month] = len(records)
+        print(f"Compacted {len(paths)} files into {month} segment ({len(records)} records)")
+        if not keep_sources:
+            for path in paths:
+                os.remove(path)
+    return written
+
+
+# ----------------------------
+# Archive reader
+# ----------------------------
+class ArchiveReader:
+    """Iterate tweets across every segment and snapshot file without loading them whole."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+
+    def files(self):
+        """Materialized monthly segments first, then any remaining daily snapshots.
+
+        Daily files kept after compacting (``compact --keep``) are already in
+        their segment and are left out.
+        """
+        store = SegmentStore(self.root)
+        compacted = {name for entry in store.manifest()["segments"].values()
+                     for name in entry.get("sources", [])}
+        daily = [path for path in sorted(glob.glob(os.path.join(self.root, SNAPSHOT_GLOB)))
+                 if os.path.basename(path) not in compacted]
+        return store.materialized_files() + daily
+
+    def indexes(self):
+        for path in self.files():
+            yield SnapshotIndex.load(path)
+
+    def record_days(self, index):
+        """Day of the snapshot each record of ``index`` came from, in entry order.
+
+        A daily snapshot's records all share its own day; a segment's come from
+        its manifest, since compacting merges many days into one file.
+        """
+        segments_dir = os.path.join(ARCHIVE_INDEX_DIR, SEGMENT_DIRNAME)
+        if os.path.dirname(index.path) == segments_dir:
+            month = os.path.basename(index.path)[len("tweets_"):-len(".json")]
+            days = SegmentStore(self.root).record_days(month)
+            if len(days) == len(index):
+                return days
+        return [snapshot_day(index.path)] * len(index)
+
+    def iter_tweets(self, user=None, bias=None, typed=False):
+        """Yield tweets (dicts, or ``TweetRecord`` if ``typed``) matching the filters.
+
+        Non-matching records are skipped using the index alone and never decoded.
+        """
+        want_user = normalize_handle(user) if user else None
+        for index in self.indexes():
+            matches = [
+                e for e in index.entries
+                if (want_user is None or normalize_handle(e[3]) == want_user)
+                and (bias is None or e[4] == bias)
+            ]
+            if not matches:
+                continue
+            with open_mapped(index.path) as buf:
+                for start, end, *_ in matches:
+                    rec = codec.loads(buf[start:end])
+                    yield codec.record_from_dict(rec) if typed else rec
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scan the tweet archive lazily.")
+    parser.add_argument("--user")
+    parser.add_argument("--bias")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    count = 0
+    for tweet in ArchiveReader(args.root).iter_tweets(user=args.user, bias=args.bias):
+        count += 1
+        print(f"{tweet.get('id', '')}\t{tweet['user']}\t{tweet['bias']}\t{tweet['text'][:80]!r}")
+    print(f"{count} matching tweets")
@@ -0,0 +1,85 @@
+"""Benchmark the codec backends against the stock ``save_tweets_to_json`` output.
+
+The corpus is the ``--records`` oldest unique tweets in the archive, read
+through ``archive.ArchiveReader`` so compacting daily files into segments does
+not change it.
+
+Usage: python benchmarks/bench_codec.py [--records N] [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive  # noqa: E402
+import codec  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def load_corpus(limit):
+    """The ``limit`` oldest archived tweets with a real id, oldest first."""
+    records = {}
+    for rec in archive.ArchiveReader(DATA_DIR).iter_tweets():
+        tweet_id = str(rec.get("id") or "")
+        if tweet_id.isdigit():  # temp ids carry no order
+            records.setdefault(tweet_id, rec)
+    return [records[i] for i in sorted(records, key=int)[:limit]]
+
+
+def baseline_save(records, path):
+    """The original ``save_tweets_to_json`` write path."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load_corpus(args.records)
+    print(f"Corpus: {len(records)} records")
+
+    tmp = tempfile.mkdtemp(prefix="bench_codec_")
+    base_path = os.path.join(tmp, "baseline.json")
+    base_write = best_of(lambda: baseline_save(records, base_path), args.repeat)
+    with open(base_path, "rb") as f:
+        base_bytes = f.read()
+    base_read = best_of(lambda: json.loads(base_bytes), args.repeat)
+    print(f"{'baseline json indent=2':<28} write {base_write * 1000:8.2f} ms  "
+          f"read {base_read * 1000:8.2f} ms  size {len(base_bytes):>9} B")
+
+    for backend in codec._available_backends():
+        for compact in (False, True):
+            path = os.path.join(tmp, f"{backend}_{int(compact)}.json")
+            write = best_of(lambda: codec.write_json(records, path, compact, backend), args.repeat)
+            with open(path, "rb") as f:
+                data = f.read()
+            read = best_of(lambda: codec.loads(data, backend), args.repeat)
+            typed = best_of(lambda: codec.decode_tweets(data, backend), args.repeat)
+            label = f"{backend} {'compact' if compact else 'indent=2'}"
+            parity = ""
+            if not compact:
+                parity = "  identical" if data == base_bytes else "  DIFFERS from baseline"
+            print(f"{label:<28} write {write * 1000:8.2f} ms  read {read * 1000:8.2f} ms  "
+                  f"typed {typed * 1000:8.2f} ms  size {len(data):>9} B  "
+                  f"x{base_write / write:5.1f} write{parity}")
+
+
+if __name__ == "__main__":
+    main()
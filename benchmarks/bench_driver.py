@@ -0,0 +1,126 @@
+"""Page-load time and browser memory of the stock vs the lean Chrome profile.
+
+Each profile gets its own Chrome session and loads the same timelines: the
+first page of each handle plus ``--scrolls`` infinite-scroll pages. Reported per
+profile: median time to a visible timeline, requests and bytes transferred, and
+memory after the last page from CDP ``Performance.getMetrics`` (JS heap, DOM
+nodes), plus the resident size of the browser processes when psutil is
+installed.
+
+Against a real instance the numbers include its avatars and attachments. With
+``--stub`` the timelines are served by nitter_stub from data/, which renders no
+media, so only the feature and cache trimming shows up.
+
+Usage: python benchmarks/bench_driver.py [--base-url URL | --stub] [--handles N] [--scrolls N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from selenium.webdriver.common.by import By  # noqa: E402
+from selenium.webdriver.support import expected_conditions as EC  # noqa: E402
+from selenium.webdriver.support.ui import WebDriverWait  # noqa: E402
+
+import main as scraper  # noqa: E402
+import nitter_stub  # noqa: E402
+
+try:
+    import psutil
+except ImportError:  # optional; only used for the resident-size column
+    psutil = None
+
+TIMELINE = (By.CSS_SELECTOR, "div[class*='timeline-item']")
+
+
+def browser_rss(driver):
+    """Resident bytes of chromedriver's Chrome process tree, or None without psutil."""
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        return sum(p.memory_info().rss for p in root.children(recursive=True))
+    except psutil.Error:
+        return None
+
+
+def transferred(driver):
+    return driver.execute_script(
+        "var e = performance.getEntriesByType('resource');"
+        "return [e.length, e.reduce(function (n, r) { return n + (r.transferSize || 0); }, 0)];")
+
+
+def run_profile(lean, base_url, handles, scrolls):
+    driver = scraper.setup_driver(lean=lean)
+    loads, requests_made, bytes_in = [], 0, 0
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        for handle in handles:
+            t0 = time.perf_counter()
+            driver.get(f"{base_url}/{handle.lstrip('@')}")
+            WebDriverWait(driver, 30).until(EC.visibility_of_all_elements_located(TIMELINE))
+            loads.append(time.perf_counter() - t0)
+            for _ in range(scrolls):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(scraper.SCROLL_PAUSE_TIME)
+            count, size = transferred(driver)
+            requests_made += count
+            bytes_in += size
+        perf = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+        return {
+            "load_median": statistics.median(loads),
+            "load_max": max(loads),
+            "requests": requests_made,
+            "bytes": bytes_in,
+            "js_heap": perf.get("JSHeapUsedSize", 0),
+            "nodes": perf.get("Nodes", 0),
+            "rss": browser_rss(driver),
+        }
+    finally:
+        driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--base-url", default=os.getenv("NITTER_BASE_URL", "https://nitter.net"))
+    source.add_argument("--stub", action="store_true", help="Serve data/ with nitter_stub instead")
+    parser.add_argument("--handles", type=int, default=3)
+    parser.add_argument("--scrolls", type=int, default=3, help="Infinite-scroll pages per handle")
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    handles = scraper.CREATOR_HANDLES[:args.handles]
+    if args.stub:
+        timelines = nitter_stub.rebase_dates(nitter_stub.load_archive(os.path.join(ROOT, "data")))
+        base_url = nitter_stub.NitterStub(("127.0.0.1", 0), timelines).start().base_url
+        handles = sorted(timelines, key=lambda h: -len(timelines[h]))[:args.handles]
+
+    results = {}
+    for name, lean in (("stock", False), ("lean", True)):
+        print(f"Loading {len(handles)} timelines with the {name} profile...")
+        results[name] = run_profile(lean, base_url, handles, args.scrolls)
+
+    def mib(n):
+        return "-" if n is None else f"{n / 2**20:,.1f} MiB"
+
+    rows = [
+        ("page load, median", lambda r: f"{r['load_median']:.2f} s"),
+        ("page load, max", lambda r: f"{r['load_max']:.2f} s"),
+        ("requests", lambda r: f"{r['requests']:,}"),
+        ("transferred", lambda r: mib(r["bytes"])),
+        ("JS heap", lambda r: mib(r["js_heap"])),
+        ("DOM nodes", lambda r: f"{r['nodes']:,.0f}"),
+        ("browser RSS", lambda r: mib(r["rss"])),
+    ]
+    print(f"{'':<20} {'stock':>14} {'lean':>14}")
+    for label, fmt in rows:
+        print(f"{label:<20} {fmt(results['stock']):>14} {fmt(results['lean']):>14}")
+
+
+if __name__ == "__main__":
+    main()
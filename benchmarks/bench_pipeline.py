@@ -0,0 +1,155 @@
+"""Throughput of each scraper stage on a fixed corpus, tracked across commits.
+
+The corpus is the ``--records`` oldest unique tweets in data/ (so it does not
+change as the archive grows) rendered into Nitter timeline pages, plus
+any recorded pages given with ``--pages``. Each stage reports tweets/sec; with
+``--record`` the run is appended to benchmarks/results.jsonl together with the
+git commit, and every run is compared against the last recorded one when both
+used the same corpus. Only a clean checkout can be recorded.
+
+Usage: python benchmarks/bench_pipeline.py [--records N] [--repeat N] [--pages DIR] [--record]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import cache  # noqa: E402
+import lexicon  # noqa: E402
+import main as scraper  # noqa: E402
+import nitter_html  # noqa: E402
+import nitter_stub  # noqa: E402
+import tickers  # noqa: E402
+
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results.jsonl")
+PAGE_SIZE = 20
+
+
+def load_corpus(limit):
+    """Timeline items for the ``limit`` oldest archived tweets, oldest first."""
+    timelines = nitter_stub.load_archive(os.path.join(ROOT, "data"))
+    items = [item for handle_items in timelines.values() for item in handle_items]
+    items.sort(key=lambda item: int(nitter_html.tweet_id_from_href(item["href"])))
+    return items[:limit]
+
+
+def render_pages(items):
+    return [nitter_stub.render_page("bench", items[i:i + PAGE_SIZE])
+            for i in range(0, len(items), PAGE_SIZE)]
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD"), bool(git("status", "--porcelain", "--untracked-files=no"))
+
+
+def run_benchmarks(items, pages, repeat):
+    texts = [item["text"] for item in items]
+    tweets = [{"user": item["user"], "text": item["text"], "bias": None, "tickers": [],
+               "id": nitter_html.tweet_id_from_href(item["href"])} for item in items]
+    page_tweets = sum(len(nitter_html.parse_timeline(p)[0]) for p in pages)
+    out_path = os.path.join(tempfile.mkdtemp(prefix="bench_pipeline_"), "tweets.json")
+
+    big_lexicon = lexicon.CompiledLexicon(lexicon.load_lexicon(lexicon.DEFAULT_LEXICON_PATH))
+
+    # Measure the analysis itself, not the caches in front of it.
+    scraper.CLASSIFICATION_CACHE = False
+    scraper._analysis_memo = cache.LRUMemo(0)
+
+    stages = [
+        ("extract_tickers", len(texts), lambda: [tickers.extract_tickers(t) for t in texts]),
+        ("looks_like_finance", len(texts), lambda: [scraper.looks_like_finance(t) for t in texts]),
+        ("detect_bias", len(texts), lambda: [scraper.detect_bias(t) for t in texts]),
+        ("detect_bias (classifiers.py)", len(texts), lambda: [big_lexicon.detect(t) for t in texts]),
+        ("analyze_text", len(texts), lambda: [scraper.analyze_text(t) for t in texts]),
+        ("parse_timeline", page_tweets, lambda: [nitter_html.parse_timeline(p) for p in pages]),
+        ("save_tweets_to_json", len(tweets), lambda: scraper.save_tweets_to_json(tweets, out_path)),
+        ("replay pipeline", page_tweets, lambda: scraper.replay_pages(pages)),
+    ]
+    results = {}
+    for name, count, fn in stages:
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = best_of(fn, repeat)
+        results[name] = round(count / elapsed, 1)
+    return results
+
+
+def last_recorded():
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    last = None
+    with open(RESULTS_FILE, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", help="Also include recorded .html pages from this directory")
+    parser.add_argument("--record", action="store_true", help=f"Append this run to {os.path.relpath(RESULTS_FILE, ROOT)}")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    if args.record and dirty:
+        parser.error("--record needs a clean checkout; commit or stash your changes first")
+
+    items = load_corpus(args.records)
+    pages = render_pages(items)
+    if args.pages:
+        pages.extend(scraper.read_saved_pages(scraper.find_saved_pages(args.pages)))
+    print(f"Corpus: {len(items)} tweets, {len(pages)} pages")
+
+    results = run_benchmarks(items, pages, args.repeat)
+    previous = last_recorded()
+    if previous and (previous["records"], previous["pages"]) != (len(items), len(pages)):
+        print(f"Not comparing with {previous['commit']}: it ran on {previous['records']} tweets, "
+              f"{previous['pages']} pages")
+        previous = None
+    print(f"{'stage':<30} {'tweets/sec':>12}  vs {previous['commit'] if previous else '-'}")
+    for name, rate in results.items():
+        change = ""
+        if previous and previous["results"].get(name):
+            change = f"{(rate / previous['results'][name] - 1) * 100:+7.1f}%"
+        print(f"{name:<30} {rate:>12,.0f}  {change}")
+
+    if args.record:
+        entry = {
+            "commit": commit,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "records": len(items),
+            "pages": len(pages),
+            "results": results,
+        }
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"Recorded in {os.path.relpath(RESULTS_FILE, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Memoization of text analysis results.
+
+``ClassificationCache`` persists results across runs in a SQLite file
+(``CLASSIFICATION_CACHE_DB``). It maps (digest of tweet text, lexicon
+fingerprint) -> (finance gate result, bias, tickers). The fingerprint covers the
+content of every lexicon and filter that feeds the analysis, so editing any of
+them invalidates old entries automatically. The table is capped at
+``CLASSIFICATION_CACHE_MAX`` rows with least-recently-used eviction.
+
+``LRUMemo`` is a bounded in-process cache in front of it, keyed by the same text
+digest, so text repeated within a run (retweets, quote chains) skips both the
+analysis and the SQLite lookup. It holds at most ``ANALYSIS_MEMO_SIZE`` results
+and is dropped when the process exits.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:  # falls back to blake2b
+    xxhash = None
+
+CLASSIFICATION_CACHE_DB = os.getenv("CLASSIFICATION_CACHE_DB", ".cache/classification.sqlite")
+CLASSIFICATION_CACHE_MAX = int(os.getenv("CLASSIFICATION_CACHE_MAX", "200000"))
+FLUSH_EVERY = 500
+ANALYSIS_MEMO_SIZE = int(os.getenv("ANALYSIS_MEMO_SIZE", "4096"))
+
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest     TEXT NOT NULL,
+    lexicon    TEXT NOT NULL,
+    is_finance INTEGER NOT NULL,
+    bias       TEXT,
+    tickers    TEXT NOT NULL,
+    last_used  REAL NOT NULL,
+    PRIMARY KEY (digest, lexicon)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def text_digest(text: str) -> str:
+    data = (text or "").encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def lexicon_fingerprint(*parts) -> str:
+    """Stable hash of lexicon contents (dicts keep order, sets are sorted)."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, dict):
+            items = list(part.items())
+        elif isinstance(part, (set, frozenset)):
+            items = sorted(part)
+        else:
+            items = part
+        h.update(repr(items).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+class LRUMemo:
+    """Bounded in-memory LRU map from text digest to analysis result."""
+
+    def __init__(self, maxsize=ANALYSIS_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, digest):
+        result = self._data.get(digest)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(digest)
+        return result
+
+    def put(self, digest, result):
+        self._data[digest] = result
+        self._data.move_to_end(digest)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class ClassificationCache:
+    """SQLite-backed LRU cache of (is_finance, bias, tickers) per text and lexicon version."""
+
+    def __init__(self, lexicon: str, path=CLASSIFICATION_CACHE_DB, max_entries=CLASSIFICATION_CACHE_MAX):
+        self.lexicon = lexicon
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Writes (new results and LRU touches) are buffered and flushed in batches.
+        self._pending = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Used from whichever pipeline stage runs the analysis, one thread at a time.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS results")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            # Entries from any other lexicon version can never be served again.
+            self.conn.execute("DELETE FROM results WHERE lexicon != ?", (lexicon,))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def get(self, text, digest=None):
+        """Cached (is_finance, bias, tickers) for ``text``, or None."""
+        digest = digest or text_digest(text)
+        pending = self._pending.get(digest)
+        if pending is not None:
+            self.hits += 1
+            return pending
+        row = self.conn.execute(
+            "SELECT is_finance, bias, tickers FROM results WHERE digest = ? AND lexicon = ?",
+            (digest, self.lexicon),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        result = (bool(row[0]), row[1], tuple(row[2].split(",")) if row[2] else ())
+        self._queue(digest, result)  # refresh last_used
+        return result
+
+    def put(self, text, is_finance, bias, tickers=(), digest=None):
+        self._queue(digest or text_digest(text), (bool(is_finance), bias, tuple(tickers)))
+
+    def _queue(self, digest, result):
+        self._pending[digest] = result
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Write buffered results and LRU touches, then enforce the size cap."""
+        if not self._pending:
+            return
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (digest, lexicon, is_finance, bias, tickers, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((digest, self.lexicon, int(is_finance), bias, ",".join(tickers), now)
+                 for digest, (is_finance, bias, tickers) in self._pending.items()),
+            )
+        self._pending.clear()
+        self.evict()
+
+    def evict(self):
+        """Drop least-recently-used rows beyond ``max_entries``."""
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM results WHERE (digest, lexicon) IN "
+                    "(SELECT digest, lexicon FROM results ORDER BY last_used LIMIT ?)", (excess,)
+                )
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
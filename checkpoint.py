@@ -0,0 +1,136 @@
+"""Checkpoints that let an interrupted scrape resume where it stopped.
+
+A run keeps two files in ``CHECKPOINT_DIR``:
+
+- ``state.json``: output file, scrape cutoff, handles already done and, for
+  the handle in progress, the Nitter ``?cursor=`` of the next unread page.
+  It is replaced atomically on every change.
+- ``tweets.jsonl``: every tweet written so far, one compact JSON object per
+  line, flushed as it is added.
+
+The output file is only assembled from ``tweets.jsonl`` at the end (or when the
+run is interrupted), so a killed run loses at most the page in flight. The next
+run with a checkpoint younger than ``CHECKPOINT_MAX_AGE`` seconds picks it up:
+same output file and cutoff, finished handles skipped, the interrupted handle
+continued from its cursor.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import codec
+
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".cache/checkpoint")
+# Longer than the daily CI schedule, so the next scheduled run still resumes a
+# run that timed out.
+CHECKPOINT_MAX_AGE = float(os.getenv("CHECKPOINT_MAX_AGE", "108000"))
+
+
+class Checkpoint:
+    def __init__(self, root=CHECKPOINT_DIR):
+        self.root = root
+        self.state_path = os.path.join(root, "state.json")
+        self.tweets_path = os.path.join(root, "tweets.jsonl")
+        self.state = {}
+        self._lock = threading.Lock()
+        self._tweets = None
+
+    @classmethod
+    def open(cls, output_file, cutoff_time, root=CHECKPOINT_DIR, resume=True):
+        """Resume a recent checkpoint under ``root``, or start a new one.
+
+        Returns (checkpoint, resumed). A resumed checkpoint keeps its own
+        ``output_file`` and ``cutoff_time``.
+        """
+        checkpoint = cls(root)
+        if resume and os.path.exists(checkpoint.state_path):
+            state = codec.read_json(checkpoint.state_path)
+            if time.time() - state.get("updated", 0) <= CHECKPOINT_MAX_AGE:
+                checkpoint.state = state
+                checkpoint._open_tweets()
+                return checkpoint, True
+        checkpoint.clear()
+        checkpoint.state = {
+            "output_file": output_file,
+            "cutoff": cutoff_time.isoformat(),
+            "completed": [],
+            "cursors": {},
+        }
+        checkpoint._open_tweets()
+        checkpoint._save()
+        return checkpoint, False
+
+    # ---------- accessors ----------
+    @property
+    def output_file(self):
+        return self.state["output_file"]
+
+    @property
+    def cutoff_time(self):
+        return datetime.fromisoformat(self.state["cutoff"])
+
+    def cursor(self, handle):
+        """``?cursor=...`` of the first unread page of ``handle``, or None."""
+        return self.state["cursors"].get(handle)
+
+    def tweets(self):
+        if not os.path.exists(self.tweets_path):
+            return
+        with open(self.tweets_path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):  # a torn final line is the tweet in flight
+                    yield codec.loads(line)
+
+    def seen_ids(self):
+        return {str(tweet["id"]) for tweet in self.tweets()}
+
+    # ---------- updates ----------
+    def add(self, tweet):
+        """Append one (simplified) tweet; it survives the process being killed."""
+        with self._lock:
+            self._tweets.write(codec.dumps(tweet, compact=True) + b"\n")
+            self._tweets.flush()
+
+    def set_cursor(self, handle, cursor):
+        with self._lock:
+            self.state["cursors"][handle] = cursor
+            self._save()
+
+    def complete(self, handle):
+        with self._lock:
+            self.state["cursors"].pop(handle, None)
+            if handle not in self.state["completed"]:
+                self.state["completed"].append(handle)
+            self._save()
+
+    def finalize(self, compact=False):
+        """Write every checkpointed tweet to the output file; returns the count."""
+        self._tweets.flush()
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with codec.JSONArrayWriter(self.output_file, compact=compact) as writer:
+            for tweet in self.tweets():
+                writer.write(tweet)
+        return writer.count
+
+    def clear(self):
+        """Forget the run (after it finished)."""
+        if self._tweets is not None:
+            self._tweets.close()
+            self._tweets = None
+        for path in (self.state_path, self.tweets_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---------- internals ----------
+    def _open_tweets(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._tweets = open(self.tweets_path, "ab")
+
+    def _save(self):
+        self.state["updated"] = time.time()
+        tmp = self.state_path + ".tmp"
+        codec.write_json(self.state, tmp)
+        os.replace(tmp, self.state_path)
@@ -882,7 +882,7 @@ CLASSIFIERS = {
     "velocity trap": "Panic / Capitulation",
     "reflexivity": "Confirmation Bias",
     "reflexivity": "Confirmation Bias",
-    "reflexivity": "Confirmation Bias"
+    "reflexivity": "Confirmation Bias",
 
     "to the moon before it's too late": "FOMO",
     "to the moon while you can": "FOMO",
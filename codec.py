@@ -0,0 +1,173 @@
+"""JSON serializer layer for tweet snapshots.
+
+Prefers orjson, then msgspec, and falls back to the stdlib ``json`` module.
+Set ``JSON_BACKEND`` to ``orjson``, ``msgspec`` or ``json`` to force one.
+"""
+import json
+import os
+from dataclasses import dataclass, field, fields
+from typing import List
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional speedup
+    msgspec = None
+
+
+# ----------------------------
+# Tweet record
+# ----------------------------
+@dataclass
+class TweetRecord:
+    """One saved tweet, as written by ``save_tweets_to_json``."""
+    user: str
+    text: str
+    bias: str
+    id: str
+    tickers: List[str] = field(default_factory=list)
+
+
+TWEET_FIELDS = tuple(f.name for f in fields(TweetRecord))
+
+
+# ----------------------------
+# Backends
+# ----------------------------
+def _available_backends():
+    names = []
+    if orjson is not None:
+        names.append("orjson")
+    if msgspec is not None:
+        names.append("msgspec")
+    names.append("json")
+    return names
+
+
+def select_backend(name: str = "auto") -> str:
+    """Resolve a backend name, falling back to the best installed one."""
+    available = _available_backends()
+    name = (name or "auto").lower()
+    if name == "auto":
+        return available[0]
+    if name not in available:
+        print(f"JSON backend '{name}' not available, using {available[0]}")
+        return available[0]
+    return name
+
+
+BACKEND = select_backend(os.getenv("JSON_BACKEND", "auto"))
+
+if msgspec is not None:
+    _MSGSPEC_ENCODER = msgspec.json.Encoder()
+    _MSGSPEC_TWEETS_DECODER = msgspec.json.Decoder(List[TweetRecord])
+
+
+def dumps(obj, compact: bool = False, backend: str = None) -> bytes:
+    """Serialize to UTF-8 JSON bytes; pretty output matches ``json.dump(indent=2)``."""
+    backend = backend or BACKEND
+    if backend == "orjson":
+        return orjson.dumps(obj) if compact else orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    if backend == "msgspec":
+        raw = _MSGSPEC_ENCODER.encode(obj)
+        return raw if compact else msgspec.json.format(raw, indent=2)
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data, backend: str = None):
+    """Parse JSON from bytes or str."""
+    backend = backend or BACKEND
+    if backend == "orjson":
+        return orjson.loads(data)
+    if backend == "msgspec":
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def record_from_dict(d) -> TweetRecord:
+    return TweetRecord(
+        user=d.get("user", ""),
+        text=d.get("text", ""),
+        bias=d.get("bias") or "None",
+        id=str(d.get("id", "")),
+        tickers=list(d.get("tickers") or []),
+    )
+
+
+def decode_tweets(data, backend: str = None) -> List[TweetRecord]:
+    """Decode a snapshot straight into ``TweetRecord`` objects."""
+    backend = backend or BACKEND
+    if backend == "msgspec":
+        try:
+            return _MSGSPEC_TWEETS_DECODER.decode(data)
+        except msgspec.ValidationError:
+            pass  # older snapshots with loose types; take the generic path
+    return [record_from_dict(d) for d in loads(data, backend)]
+
+
+# ----------------------------
+# File helpers
+# ----------------------------
+def read_json(path: str, backend: str = None):
+    """Load a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read(), backend)
+
+
+def read_tweets(path: str, backend: str = None) -> List[TweetRecord]:
+    """Load a snapshot file as ``TweetRecord`` objects."""
+    with open(path, "rb") as f:
+        return decode_tweets(f.read(), backend)
+
+
+def write_json(obj, path: str, compact: bool = False, backend: str = None):
+    """Write ``obj`` to ``path`` as JSON."""
+    with open(path, "wb") as f:
+        f.write(dumps(obj, compact=compact, backend=backend))
+
+
+class JSONArrayWriter:
+    """Stream a JSON array to ``path`` one element at a time.
+
+    The finished file is byte-identical to ``write_json`` on the full list.
+    """
+
+    def __init__(self, path: str, compact: bool = False, backend: str = None):
+        self.path = path
+        self.compact = compact
+        self.backend = backend
+        self.count = 0
+        self._file = open(path, "wb")
+
+    def write(self, obj):
+        data = dumps(obj, compact=self.compact, backend=self.backend)
+        if self.compact:
+            self._file.write((b"," if self.count else b"[") + data)
+        else:
+            self._file.write((b",\n  " if self.count else b"[\n  ") + data.replace(b"\n", b"\n  "))
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        if not self.count:
+            self._file.write(b"[]")
+        else:
+            self._file.write(b"]" if self.compact else b"\n]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
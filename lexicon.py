@@ -0,0 +1,207 @@
+"""Compiled bias lexicons and version-to-version impact analysis.
+
+A lexicon is a ``CLASSIFIERS``-style dict of phrase -> bias, where the first
+phrase (in dict order) found as a substring of the lowercased text wins, just
+like ``detect_bias``. ``Matcher`` is an Aho-Corasick automaton that finds every
+phrase in a single pass over the text, so several lexicon versions can share
+one scan.
+"""
+import ast
+import os
+import subprocess
+from collections import Counter
+
+import aggregates
+import archive
+
+# Below this many phrases a straight scan of the precomputed tuple beats the
+# per-character automaton walk.
+SMALL_LEXICON_SIZE = 64
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classifiers.py")
+
+
+# ----------------------------
+# Loading lexicon versions
+# ----------------------------
+def parse_classifiers(source: str, name: str = "CLASSIFIERS") -> dict:
+    """Extract the ``CLASSIFIERS`` dict literal from Python source without executing it."""
+    tree = ast.parse(source)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == name for t in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"No {name} assignment found")
+
+
+def load_lexicon(spec: str) -> dict:
+    """Load a lexicon from a file path, or from git with ``git:REV`` / ``git:REV:path``."""
+    if spec.startswith("git:"):
+        _, _, rest = spec.partition(":")
+        rev, _, path = rest.partition(":")
+        path = path or "classifiers.py"
+        source = subprocess.run(
+            ["git", "show", f"{rev}:{path}"], check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(DEFAULT_LEXICON_PATH),
+        ).stdout
+    else:
+        with open(spec, encoding="utf-8") as f:
+            source = f.read()
+    return parse_classifiers(source)
+
+
+# ----------------------------
+# Aho-Corasick matcher
+# ----------------------------
+class Matcher:
+    """Finds every pattern occurring in a text in one left-to-right pass."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        out = [()]
+        for pid, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (pid,)
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:  # breadth-first; the list grows as we go
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0)
+                out[child] += out[fail[child]]
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def find(self, text: str) -> set:
+        """Ids of all patterns that occur in ``text``."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                hits.update(out[node])
+        return hits
+
+
+class CompiledLexicon:
+    """A lexicon preprocessed once into immutable, lowercased lookup tables.
+
+    ``phrases`` holds each distinct lowercased phrase in first-seen order and
+    ``biases`` the parallel category, so the first hit in tuple order is the
+    first hit in dict order. Large lexicons are matched with ``Matcher``.
+    """
+
+    def __init__(self, classifiers: dict):
+        phrases = {}
+        for keyword, bias in classifiers.items():
+            phrases.setdefault(keyword.lower(), bias)
+        self.phrases = tuple(phrases)
+        self.biases = tuple(phrases.values())
+        self.matcher = Matcher(self.phrases) if len(self.phrases) > SMALL_LEXICON_SIZE else None
+
+    def detect(self, text: str):
+        """Same result as ``detect_bias`` with this lexicon."""
+        t = (text or "").lower()
+        if self.matcher is None:
+            for phrase, bias in zip(self.phrases, self.biases):
+                if phrase in t:
+                    return bias
+            return None
+        hits = self.matcher.find(t)
+        return self.biases[min(hits)] if hits else None
+
+
+# ----------------------------
+# Version diff
+# ----------------------------
+class LexiconDiff:
+    """Classifies tweets under several lexicon versions with one shared matcher."""
+
+    def __init__(self, *lexicons):
+        self.versions = len(lexicons)
+        tagged = {}  # phrase -> [(version, order, bias)]
+        for version, classifiers in enumerate(lexicons):
+            seen = set()
+            for order, (keyword, bias) in enumerate(classifiers.items()):
+                phrase = keyword.lower()
+                if phrase in seen:
+                    continue  # an earlier spelling of the same phrase already wins
+                seen.add(phrase)
+                tagged.setdefault(phrase, []).append((version, order, bias))
+        self.phrases = tuple(tagged)
+        self.tags = tuple(tuple(tagged[p]) for p in self.phrases)
+        self.matcher = Matcher(self.phrases)
+
+    def classify(self, text: str):
+        """Tuple with the label under each version (None when nothing matches)."""
+        best = [None] * self.versions
+        for pid in self.matcher.find((text or "").lower()):
+            for version, order, bias in self.tags[pid]:
+                if best[version] is None or order < best[version][0]:
+                    best[version] = (order, bias)
+        return tuple(b[1] if b else None for b in best)
+
+
+def iter_unique_tweets(reader=None):
+    """Every archived tweet once (the first copy seen)."""
+    reader = reader or archive.ArchiveReader()
+    seen = set()
+    for tweet in reader.iter_tweets():
+        key = aggregates.tweet_key(tweet.get("id"), tweet.get("user", ""), tweet.get("text", ""))
+        if key not in seen:
+            seen.add(key)
+            yield tweet
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import codec
+
+    parser = argparse.ArgumentParser(description="Show which archived tweets change label between two lexicons.")
+    parser.add_argument("old", nargs="?", default="git:HEAD",
+                        help="Old lexicon: file path or git:REV[:path] (default git:HEAD)")
+    parser.add_argument("new", nargs="?", default=DEFAULT_LEXICON_PATH,
+                        help="New lexicon: file path or git:REV[:path] (default classifiers.py)")
+    parser.add_argument("--output", help="Write every change to this JSON file")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    t0 = time.time()
+    diff = LexiconDiff(load_lexicon(args.old), load_lexicon(args.new))
+    total = 0
+    changed = []
+    for tweet in iter_unique_tweets():
+        total += 1
+        old, new = diff.classify(tweet.get("text", ""))
+        if old != new:
+            changed.append({"id": tweet.get("id"), "user": tweet["user"], "text": tweet["text"],
+                            "old": old or "None", "new": new or "None"})
+    print(f"{len(changed)} of {total} tweets change label ({time.time() - t0:.1f} seconds)")
+
+    transitions = Counter((c["old"], c["new"]) for c in changed)
+    for (old, new), count in transitions.most_common():
+        print(f"  {old:<24} -> {new:<24} {count}")
+    for c in changed[:args.limit]:
+        print(f"{c['id']}\t{c['user']}\t{c['old']} -> {c['new']}\t{c['text'][:60]!r}")
+    if args.output:
+        codec.write_json(changed, args.output)
+        print(f"Changes written to {args.output}")
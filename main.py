@@ -1,9 +1,10 @@
 import os
+import sys
 import time
 import random
-import json
-import re
+import signal
 import traceback
+from collections import namedtuple
 from datetime import datetime, timedelta, timezone
 
 import requests
@@ -15,7 +16,19 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+import aggregates
+import archive
+import cache
+import checkpoint
+import codec
+import lexicon
+import metrics
+import nitter_html
+import pipeline
+import scheduler
+import text_index
+import tickers
 
 # ----------------------------
 # Configuration
@@ -44,9 +57,48 @@ HEADLESS_MODE = True
 DEBUG_MODE = True
 SCREENSHOT_DIR = "debug_screenshots"
 MAX_SCROLL_ATTEMPTS = 30
+MAX_TWEETS_PER_HANDLE = 1000
 SCROLL_PAUSE_TIME = 2.5
 REQUEST_DELAY = random.uniform(2, 5)  # Random delay between requests
 BASE_URL = os.getenv("NITTER_BASE_URL", "https://nitter.net")
+OUTPUT_COMPACT = os.getenv("OUTPUT_COMPACT", "false").lower() in ("1", "true", "t")
+UPDATE_AGGREGATES = os.getenv("UPDATE_AGGREGATES", "true").lower() in ("1", "true", "t")
+UPDATE_TEXT_INDEX = os.getenv("UPDATE_TEXT_INDEX", "true").lower() in ("1", "true", "t")
+CLASSIFICATION_CACHE = os.getenv("CLASSIFICATION_CACHE", "true").lower() in ("1", "true", "t")
+# When set, every timeline page the scraper sees is saved under RECORD_DIR/<handle>/
+# for `main.py replay` and `nitter_stub.py --pages`.
+RECORD_DIR = os.getenv("RECORD_DIR", "")
+# Per-run timing report; see metrics.py.
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+# Page sources waiting to be parsed; each is a full timeline, so keep this small.
+PAGE_QUEUE_SIZE = 2
+# Only the timeline's text and stats are read, so by default Chrome does not
+# fetch images, video or web fonts and keeps its caches small.
+LEAN_BROWSER = os.getenv("LEAN_BROWSER", "true").lower() in ("1", "true", "t")
+BROWSER_CACHE_BYTES = int(os.getenv("BROWSER_CACHE_BYTES", str(32 * 1024 * 1024)))
+# Driver startup: an explicit chromedriver, else the one webdriver-manager
+# resolved last time (remembered in CHROMEDRIVER_PATH_CACHE), else a fresh
+# resolution. CHROME_DEBUGGER_ADDRESS (host:port) attaches to an already
+# running Chrome instead of launching one; CHROME_PROFILE_DIR keeps a profile
+# (and its HTTP cache) between runs.
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH", "")
+CHROMEDRIVER_PATH_CACHE = os.getenv("CHROMEDRIVER_PATH_CACHE", ".cache/chromedriver_path")
+CHROME_DEBUGGER_ADDRESS = os.getenv("CHROME_DEBUGGER_ADDRESS", "")
+CHROME_PROFILE_DIR = os.getenv("CHROME_PROFILE_DIR", "")
+# Memory watchdog: every MEMORY_CHECK_PAGES pages the tab's JS heap and DOM
+# size are sampled; see DriverWatchdog.
+DRIVER_HEAP_LIMIT_MB = float(os.getenv("DRIVER_HEAP_LIMIT_MB", "192"))
+DRIVER_NODE_LIMIT = int(os.getenv("DRIVER_NODE_LIMIT", "40000"))
+MEMORY_CHECK_PAGES = int(os.getenv("MEMORY_CHECK_PAGES", "3"))
+# Remove timeline items from the page once its source has been captured, so
+# each scroll costs the same however deep the timeline goes.
+PRUNE_DOM = os.getenv("PRUNE_DOM", "true").lower() in ("1", "true", "t")
+BLOCKED_URL_PATTERNS = [
+    "*/pic/*", "*/video/*",  # Nitter's proxies for avatars, banners and attachments
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.m4s",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+]
 
 # ----------------------------
 # Finance-Only Topic Filter
@@ -90,13 +142,12 @@ OFFTOPIC_BLACKLIST_TERMS = set(map(str.lower, [
     "celebrity","gossip","gaming","streamer","music video","award show"
 ]))
 
-# $TSLA or TSLA (1–5 caps), very permissive; adjust if you get false positives
-TICKER_REGEX = re.compile(r'(?<![A-Za-z0-9])(?:\$?[A-Z]{1,5})(?![A-Za-z])')
-CRYPTO_TICKER_REGEX = re.compile(r'(?<![A-Za-z0-9])(?:BTC|ETH|SOL|ADA|DOGE|SHIB)(?![A-Za-z])', re.IGNORECASE)
+# Tickers ($TSLA, TSLA, btc) are validated against the symbol universe in
+# symbols.csv; see tickers.py. Extend it with TICKER_UNIVERSE_APPEND.
 
 STRICT_FINANCE_ONLY = os.getenv("STRICT_FINANCE_ONLY", "true").lower() in ("1","true","t")
 
-def looks_like_finance(text: str) -> bool:
+def looks_like_finance(text: str, found_tickers=None) -> bool:
     """Return True if text is finance/markets-related and not political/off-topic."""
     t = (text or "").lower()
 
@@ -106,8 +157,9 @@ def looks_like_finance(text: str) -> bool:
         return False
 
     whitelist_hit = any(term in t for term in FINANCE_WHITELIST_TERMS)
-    ticker_hit = bool(TICKER_REGEX.search(text or "")) or bool(CRYPTO_TICKER_REGEX.search(text or ""))
-    return whitelist_hit or ticker_hit
+    if found_tickers is None:
+        found_tickers = tickers.extract_tickers(text)
+    return whitelist_hit or bool(found_tickers)
 
 # ----------------------------
 # Bias Keyword Classifiers (existing behavior)
@@ -130,25 +182,35 @@ CLASSIFIERS = {
 # Driver / Nitter helpers
 # ----------------------------
 def test_nitter_instances() -> str:
-    """Pick a working Nitter instance."""
-    for base in [os.getenv("NITTER_BASE_URL", "")] + NITTR_INSTANCES:
-        base = base or ""
-        if not base:
-            continue
+    """Pick a working Nitter instance.
+
+    A ``NITTER_BASE_URL`` that is set is always used, even when it fails the
+    check, so runs against a local instance never reach the live mirrors.
+    """
+    pinned = os.getenv("NITTER_BASE_URL", "")
+    for base in [pinned] if pinned else NITTR_INSTANCES:
         try:
-            r = requests.get(base, timeout=8)
+            with run_metrics.timer("instance_check"):
+                r = requests.get(base, timeout=8)
             if r.ok:
                 return base
+            run_metrics.instance_error(base, f"http_{r.status_code}")
         except Exception:
+            run_metrics.instance_error(base, "unreachable")
             continue
+    if pinned:
+        print(f"Warning: {pinned} failed the instance check; using it anyway (NITTER_BASE_URL is set)")
+        return pinned
     return "https://nitter.net"
 
-def setup_driver():
-    if not os.path.exists(SCREENSHOT_DIR):
-        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-
+def driver_options(lean=None):
+    """Chrome options for the scraper; ``lean`` (default ``LEAN_BROWSER``) strips unneeded features."""
+    if lean is None:
+        lean = LEAN_BROWSER
     ua = UserAgent()
     options = Options()
+    if CHROME_PROFILE_DIR:
+        options.add_argument(f"--user-data-dir={os.path.abspath(CHROME_PROFILE_DIR)}")
     if HEADLESS_MODE:
         options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
@@ -159,8 +221,98 @@ def setup_driver():
     options.add_argument("--disable-blink-features=AutomationControlled")
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option("useAutomationExtension", False)
+    if lean:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument(f"--disk-cache-size={BROWSER_CACHE_BYTES}")
+        options.add_argument(f"--media-cache-size={BROWSER_CACHE_BYTES}")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_argument("--disable-component-update")
+        options.add_argument("--disable-default-apps")
+        options.add_argument("--disable-sync")
+        options.add_argument("--no-first-run")
+        options.add_argument("--mute-audio")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+        options.add_argument("--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.media_stream": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+            "profile.default_content_setting_values.plugins": 2,
+        })
+    return options
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Make Chrome refuse requests matching ``patterns`` (images, media and fonts by default)."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+def remembered_chromedriver():
+    """The chromedriver resolved by an earlier run, if it is still there."""
+    try:
+        with open(CHROMEDRIVER_PATH_CACHE, encoding="utf-8") as f:
+            path = f.read().strip()
+    except OSError:
+        return None
+    return path if path and os.access(path, os.X_OK) else None
+
+def chromedriver_path(refresh=False):
+    """Path of a chromedriver binary, or None to let Selenium find one.
+
+    webdriver-manager checks the network for the latest driver on every call,
+    so its answer is remembered and reused until ``refresh`` is set.
+    """
+    if CHROMEDRIVER_PATH:
+        return CHROMEDRIVER_PATH
+    if not refresh and remembered_chromedriver():
+        return remembered_chromedriver()
+    try:
+        with run_metrics.timer("driver_resolve"):
+            path = ChromeDriverManager().install()
+    except Exception as e:
+        # Offline or rate limited: Selenium Manager still finds a driver on
+        # PATH or in its own cache.
+        print(f"Could not resolve chromedriver ({type(e).__name__}: {e}); falling back to Selenium Manager")
+        return None
+    os.makedirs(os.path.dirname(CHROMEDRIVER_PATH_CACHE) or ".", exist_ok=True)
+    with open(CHROMEDRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+        f.write(path)
+    return path
+
+def attach_options(address):
+    """Options for attaching to a Chrome started with ``--remote-debugging-port``.
+
+    Chromedriver rejects launch-only options when attaching, so everything
+    else comes from how that Chrome was started.
+    """
+    options = Options()
+    options.add_experimental_option("debuggerAddress", address)
+    return options
+
+def start_driver(options):
+    remembered = not CHROMEDRIVER_PATH and remembered_chromedriver() is not None
+    try:
+        return webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+    except Exception as e:
+        if not remembered:
+            raise
+        # The remembered driver no longer matches Chrome (e.g. after a browser
+        # update); resolve it again once.
+        print(f"Cached chromedriver failed ({type(e).__name__}); resolving it again")
+        return webdriver.Chrome(service=Service(chromedriver_path(refresh=True)), options=options)
+
+def setup_driver(lean=None):
+    if not os.path.exists(SCREENSHOT_DIR):
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    if lean is None:
+        lean = LEAN_BROWSER
+    if CHROME_DEBUGGER_ADDRESS:
+        driver = start_driver(attach_options(CHROME_DEBUGGER_ADDRESS))
+        driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": UserAgent().random})
+    else:
+        driver = start_driver(driver_options(lean))
     driver.execute_cdp_cmd("Network.setExtraHTTPHeaders", {"headers": {
         "Accept-Language": "en-US,en;q=0.9",
         "Upgrade-Insecure-Requests": "1",
@@ -170,8 +322,120 @@ def setup_driver():
         "Connection": "keep-alive",
         "TE": "Trailers",
     }})
+    if lean:
+        block_resources(driver)
     return driver
 
+# ----------------------------
+# Browser memory watchdog
+# ----------------------------
+# Serialises the page and marks the timeline items it contained, in one script
+# so nothing can load in between. Items an infinite-scroll fetch appends later
+# stay unmarked until the next capture.
+CAPTURE_TIMELINE_JS = """
+var html = document.documentElement.outerHTML;
+var items = document.querySelectorAll("div[class*='timeline-item']");
+for (var i = 0; i < items.length; i++) { items[i].setAttribute("data-captured", ""); }
+return html;
+"""
+# Drops every captured timeline item but the last ``keep`` and returns how many
+# were removed. The survivors are the sentinel: the wait for visible timeline
+# items still succeeds when a scroll loads nothing new, and their ids are
+# already seen, so they are skipped when parsed again.
+PRUNE_TIMELINE_JS = """
+var items = document.querySelectorAll("div[class*='timeline-item'][data-captured]");
+var drop = items.length - arguments[0];
+for (var i = 0; i < drop; i++) { items[i].remove(); }
+return Math.max(drop, 0);
+"""
+
+def browser_memory(driver):
+    """(JS heap bytes, DOM nodes) of the current tab, from CDP ``Performance.getMetrics``."""
+    values = {m["name"]: m["value"] for m in driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]}
+    return values.get("JSHeapUsedSize", 0), values.get("Nodes", 0)
+
+def capture_timeline(driver):
+    """Page source of the current tab, marking its timeline items as read for ``prune_timeline``."""
+    return driver.execute_script(CAPTURE_TIMELINE_JS)
+
+def prune_timeline(driver, keep=1):
+    """Remove read timeline items from the page, keeping ``keep`` as a sentinel; returns how many went.
+
+    Only items marked by ``capture_timeline`` count as read, so tweets a scroll
+    fetch appended after the last capture are never dropped unparsed.
+    """
+    return driver.execute_script(PRUNE_TIMELINE_JS, keep)
+
+class DriverWatchdog:
+    """Owns the Chrome session and keeps its memory in check.
+
+    During a scrape, ``check()`` samples the tab every ``MEMORY_CHECK_PAGES``
+    pages. Over ``heap_limit`` bytes of JS heap or ``node_limit`` DOM nodes it
+    trims read items from the page, and if that is not enough reloads the
+    timeline at its last cursor. Between handles, ``recycle_if_needed()``
+    closes a session that came under pressure and callers start a fresh one
+    for the next handle, so late handles get the same clean browser as early
+    ones.
+    """
+
+    def __init__(self, heap_limit=DRIVER_HEAP_LIMIT_MB * 2**20, node_limit=DRIVER_NODE_LIMIT):
+        self.heap_limit = heap_limit
+        self.node_limit = node_limit
+        self.driver = None
+        self.pressure = False
+
+    def start(self):
+        with run_metrics.timer("driver_setup"):
+            self.driver = run_metrics.count_webdriver_calls(setup_driver())
+        self.driver.execute_cdp_cmd("Performance.enable", {})
+        run_metrics.count("sessions")
+        self.pressure = False
+        return self.driver
+
+    def over_limit(self):
+        heap, nodes = browser_memory(self.driver)
+        return heap > self.heap_limit or nodes > self.node_limit
+
+    def check(self, page_number, reload=None):
+        """Sample after a page; trims, then calls ``reload()`` (if given) when still over the limit."""
+        if not MEMORY_CHECK_PAGES or page_number % MEMORY_CHECK_PAGES:
+            return
+        with run_metrics.timer("memory_check", scroll=page_number):
+            if not self.over_limit():
+                return
+            self.pressure = True
+            removed = prune_timeline(self.driver)
+            self.driver.execute_cdp_cmd("HeapProfiler.collectGarbage", {})
+            run_metrics.count("dom_trims", scroll=page_number)
+            print(f"Browser memory over the limit, removed {removed} read timeline items")
+            if not self.over_limit() or reload is None:
+                return
+        print("Still over the limit, reloading the timeline at the last cursor")
+        run_metrics.count("page_reloads", scroll=page_number)
+        reload()
+
+    def recycle_if_needed(self):
+        """Close a session that came under pressure; the next ``start()`` brings a fresh one."""
+        if self.driver is None:
+            return
+        try:
+            needed = self.pressure or self.over_limit()
+        except Exception:
+            needed = True  # a session that cannot report its memory is not worth keeping
+        if not needed:
+            return
+        print("Recycling the browser session to release memory")
+        run_metrics.count("driver_recycles")
+        self.quit()
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
 # ----------------------------
 # Time window & parsing helpers
 # ----------------------------
@@ -179,13 +443,49 @@ def calculate_time_threshold():
     """Include tweets from the past 48 hours (adjust to taste)."""
     return datetime.now(timezone.utc) - timedelta(hours=48)
 
+# Lowercased once at import; CLASSIFIERS is treated as read-only from here on.
+COMPILED_CLASSIFIERS = lexicon.CompiledLexicon(CLASSIFIERS)
+
 def detect_bias(tweet_text: str):
     """Detect the most likely cognitive bias based on classifier keywords."""
-    t = (tweet_text or "").lower()
-    for keyword, bias in CLASSIFIERS.items():
-        if keyword.lower() in t:
-            return bias
-    return None
+    return COMPILED_CLASSIFIERS.detect(tweet_text)
+
+# Any edit to the lexicons or filters above yields a new fingerprint, which
+# invalidates previously cached results.
+LEXICON_HASH = cache.lexicon_fingerprint(
+    CLASSIFIERS, FINANCE_WHITELIST_TERMS, POLITICS_BLACKLIST_TERMS, OFFTOPIC_BLACKLIST_TERMS,
+    tickers.SYMBOLS, tickers.BARE_SYMBOLS, tickers.CRYPTO_SYMBOLS,
+)
+_classification_cache = None
+# Repeated texts within a run (retweets, quote chains, temp_ ids that slip past
+# seen_tweet_ids) are answered from memory without touching SQLite.
+_analysis_memo = cache.LRUMemo()
+run_metrics = metrics.RunMetrics()
+
+def analyze_text(tweet_text: str):
+    """Return (looks_like_finance, detect_bias, tickers) for the text, via the memo and persistent cache."""
+    global _classification_cache
+    digest = cache.text_digest(tweet_text)
+    result = _analysis_memo.get(digest)
+    if result is not None:
+        return result
+
+    if CLASSIFICATION_CACHE and _classification_cache is None:
+        _classification_cache = cache.ClassificationCache(LEXICON_HASH)
+    if _classification_cache is not None:
+        result = _classification_cache.get(tweet_text, digest)
+
+    if result is None:
+        with run_metrics.timer("gate"):
+            found_tickers = tuple(tickers.extract_tickers(tweet_text))
+            is_finance = looks_like_finance(tweet_text, found_tickers)
+        with run_metrics.timer("classify"):
+            bias = detect_bias(tweet_text)
+        result = (is_finance, bias, found_tickers)
+        if _classification_cache is not None:
+            _classification_cache.put(tweet_text, *result, digest=digest)
+    _analysis_memo.put(digest, result)
+    return result
 
 def parse_timestamp(timestamp_str: str):
     """Parse various timestamp formats from Nitter HTML."""
@@ -203,253 +503,401 @@ def parse_timestamp(timestamp_str: str):
     except Exception:
         return datetime.now(timezone.utc)
 
-def extract_metrics(tweet_element):
-    """Extract engagement metrics from tweet element."""
-    metrics = {'replies': 0, 'retweets': 0, 'quotes': 0, 'likes': 0, 'views': 0}
-    try:
-        stats_div = tweet_element.find_element(By.CLASS_NAME, 'tweet-stats')
-        stats = stats_div.find_elements(By.CLASS_NAME, 'tweet-stat')
-        for stat in stats:
-            text = stat.text.strip()
-            if not text:
-                continue
-            value = 0
-            numbers = re.findall(r'[\d,]+', text)
-            if numbers:
-                value = int(numbers[0].replace(',', ''))
-            inner = stat.get_attribute('innerHTML')
-            if 'icon-comment' in inner:
-                metrics['replies'] = value
-            elif 'icon-retweet' in inner:
-                metrics['retweets'] = value
-            elif 'icon-quote' in inner:
-                metrics['quotes'] = value
-            elif 'icon-heart' in inner:
-                metrics['likes'] = value
-            elif 'icon-play' in inner:
-                metrics['views'] = value
-    except Exception:
-        pass
-    return metrics
+def timeline_tweets(items, handle, scroll_count, seen_tweet_ids, cutoff_time, progress):
+    """Yield new, recent tweets from parsed ``timeline-item`` dicts (no gating yet).
+
+    ``progress`` counts consecutive old tweets and pages without a recent
+    tweet; the scroll loop reads it for its stop conditions.
+    """
+    found_recent_tweet = False
+    for idx, item in enumerate(items):
+        # Robust tweet id extraction
+        tweet_id = nitter_html.tweet_id_from_href(item["href"])
+        if tweet_id is None:
+            if item["text"] is not None:
+                text_snippet = item["text"][:50].replace('\n', '')
+                tweet_id = f"temp_{scroll_count}_{idx}_{hash(text_snippet)}"
+            else:
+                tweet_id = f"unknown_{scroll_count}_{idx}"
+
+        if tweet_id in seen_tweet_ids:
+            continue
+        seen_tweet_ids.add(tweet_id)
+        run_metrics.count("tweets_seen", scroll=scroll_count)
+
+        if item["date_title"]:
+            timestamp = parse_timestamp(item["date_title"])
+        else:
+            timestamp = datetime.now(timezone.utc)
+
+        if timestamp < cutoff_time:
+            run_metrics.count("tweets_old", scroll=scroll_count)
+            progress["old"] += 1
+            print(f"Skipping old tweet (timestamp: {timestamp})")
+            continue
+
+        found_recent_tweet = True
+        progress["old"] = 0
+        yield {
+            "user": item["user"] or handle,
+            "text": item["text"] or "",
+            "timestamp": timestamp.isoformat(),
+            "id": tweet_id,
+            "metrics": item["metrics"],
+            "has_media": item["has_media"],
+        }
+
+    if not found_recent_tweet:
+        progress["no_recent"] += 1
+        print(f"No recent tweets found in this scroll (consecutive: {progress['no_recent']}/3)")
+    else:
+        progress["no_recent"] = 0
+
+def classify_tweet(tweet):
+    """Apply the finance gate and bias detection; returns () for dropped tweets."""
+    with run_metrics.timer("analyze"):
+        is_finance, bias, tweet_tickers = analyze_text(tweet["text"])
+
+    # ------------- FINANCE-ONLY GATE -------------
+    if STRICT_FINANCE_ONLY and not is_finance:
+        # Drop political / off-topic / non-finance tweets
+        run_metrics.count("dropped_by_gate")
+        return ()
+    # ---------------------------------------------
+
+    run_metrics.count("labelled" if bias else "unlabelled")
+
+    tweet["bias"] = bias
+    tweet["tickers"] = list(tweet_tickers)
+    return (tweet,)
+
+# Follows a page's tweets through the pipeline, so the sink sees it only once
+# every tweet of that page has been emitted.
+PageEnd = namedtuple("PageEnd", "page_number cursor")
+
+def page_cursor(show_more_href):
+    """``?cursor=...`` query of a timeline's "Load more" link, or None."""
+    if not show_more_href or "cursor=" not in show_more_href:
+        return None
+    return show_more_href[show_more_href.index("?"):]
+
+def timeline_pipeline(handle, cutoff_time, progress, emit, seen_tweet_ids=None, on_cursor=None,
+                      max_tweets=None):
+    """Pipeline taking (page_number, html) pages and passing kept tweets to ``emit``.
+
+    Once all tweets of a page have been emitted, the cursor of the next page is
+    stored in ``progress["cursor"]`` and passed to ``on_cursor``. At most
+    ``max_tweets`` tweets are emitted when it is given.
+    """
+    seen_tweet_ids = set() if seen_tweet_ids is None else seen_tweet_ids
+
+    def full():
+        # Only the sink raises progress["kept"], so the earlier stages may read
+        # it a few tweets late; the sink's own check is what enforces the cap.
+        return max_tweets is not None and progress["kept"] >= max_tweets
+
+    def parse_page(page):
+        page_number, html = page
+        with run_metrics.timer("parse", scroll=page_number):
+            items, show_more = nitter_html.parse_timeline(html)
+        print(f"Processing {len(items)} tweets.")
+        for tweet in timeline_tweets(items, handle, page_number, seen_tweet_ids, cutoff_time, progress):
+            if full():
+                return
+            yield tweet
+        cursor = page_cursor(show_more)
+        if cursor:
+            yield PageEnd(page_number, cursor)
+
+    def classify(tweet):
+        if isinstance(tweet, PageEnd):
+            return (tweet,)
+        return () if full() else classify_tweet(tweet)
+
+    def keep(tweet):
+        if isinstance(tweet, PageEnd):
+            progress["cursor"] = tweet.cursor
+            if on_cursor is not None:
+                on_cursor(tweet.cursor)
+            return
+        if full():
+            return
+        progress["kept"] += 1
+        with run_metrics.timer("write"):
+            emit(tweet)
+
+    return pipeline.Pipeline([
+        ("parse", parse_page, PAGE_QUEUE_SIZE),
+        ("classify", classify),
+        ("sink", keep),
+    ])
 
 # ----------------------------
 # Scraper
 # ----------------------------
-def scrape_creator_tweets(driver, handle, cutoff_time):
+def scrape_creator_tweets(driver, handle, cutoff_time, sink=None, seen_tweet_ids=None, max_pages=None,
+                          time_budget=scheduler.HANDLE_MAX_BUDGET, start_cursor=None, on_cursor=None,
+                          watchdog=None):
+    """Scrape one handle's recent finance tweets.
+
+    The calling thread drives the browser and only hands the page source on;
+    parsing, classification and ``sink`` run as pipeline stages behind bounded
+    queues. Returns the tweets as a list, or just their count when ``sink`` is
+    given (each tweet is passed to it instead of being kept). Ids already in
+    ``seen_tweet_ids`` are skipped, and the set is updated in place. At most
+    ``max_pages`` pages are loaded when it is given, and collection stops once
+    ``time_budget`` seconds have passed. ``start_cursor`` (a ``?cursor=...``
+    query) starts further down the timeline; ``on_cursor`` is told the cursor
+    of the next unread page after each page's tweets reach ``sink``. A
+    ``DriverWatchdog`` gets to check the browser's memory after every page.
+    """
     print(f"\nStarting scrape for {handle}")
+    start_time = time.time()
     clean_handle = handle.lstrip('@')
-    url = f"{BASE_URL}/{clean_handle}"
+    url = f"{BASE_URL}/{clean_handle}{start_cursor or ''}"
     print(f"Navigating to: {url}")
 
     # initial page load attempts
     for attempt in range(3):
         try:
             time.sleep(random.uniform(1, 3))
-            driver.get(url)
-            time.sleep(5)
+            with run_metrics.timer("navigation"):
+                driver.get(url)
+            with run_metrics.timer("settle"):
+                time.sleep(5)
             if DEBUG_MODE:
-                driver.save_screenshot(f"{SCREENSHOT_DIR}/01_{clean_handle}_creator.png")
+                with run_metrics.timer("screenshot"):
+                    driver.save_screenshot(f"{SCREENSHOT_DIR}/01_{clean_handle}_creator.png")
                 print(f"Screenshot: 01_{clean_handle}_creator.png saved")
             break
         except Exception as e:
+            run_metrics.instance_error(BASE_URL, "navigation")
             print(f"Navigation error ({attempt+1}/3): {e}")
             if attempt == 2:
                 raise
 
-    seen_tweet_ids = set()
-    all_tweets = []
-    start_time = time.time()
-    scroll_attempts = 0
-    consecutive_no_recent_tweets = 0
-    consecutive_old_tweets = 0
-    scroll_count = 0
-
-    while scroll_attempts < MAX_SCROLL_ATTEMPTS and consecutive_no_recent_tweets < 3:
-        scroll_count += 1
-        print(f"Scroll #{scroll_count} - Attempt {scroll_attempts+1}/{MAX_SCROLL_ATTEMPTS}")
+    collected = []
+    # Written by the pipeline stages, read by the scroll loop below. Each key
+    # has a single writer, and the loop tolerates reading it a page late.
+    progress = {"old": 0, "no_recent": 0, "kept": 0, "cursor": start_cursor}
 
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    def reopen():
+        # Back to the first page not fully written yet; what was already seen
+        # is skipped through seen_tweet_ids.
+        with run_metrics.timer("navigation"):
+            driver.get(f"{BASE_URL}/{clean_handle}{progress['cursor']}")
+        with run_metrics.timer("settle"):
+            time.sleep(5)
 
-        pause_time = SCROLL_PAUSE_TIME + random.uniform(0.3, 1.0)
-        print(f"Waiting {pause_time:.1f} seconds after scroll.")
-        time.sleep(pause_time)
+    scroll_attempts = 0
+    scroll_count = 0
 
-        new_height = driver.execute_script("return document.body.scrollHeight")
-        if new_height == last_height:
-            scroll_attempts += 1
-            print("Scroll detected as ineffective (no new height)")
-        else:
-            scroll_attempts = 0
-            print(f"Scroll effective (new height: {new_height}px)")
+    emit = collected.append if sink is None else sink
+    with timeline_pipeline(handle, cutoff_time, progress, emit, seen_tweet_ids, on_cursor,
+                           max_tweets=MAX_TWEETS_PER_HANDLE) as pipe:
+        while scroll_attempts < MAX_SCROLL_ATTEMPTS and progress["no_recent"] < 3:
+            scroll_count += 1
+            print(f"Scroll #{scroll_count} - Attempt {scroll_attempts+1}/{MAX_SCROLL_ATTEMPTS}")
 
-        try:
-            print("Locating tweet elements.")
-            WebDriverWait(driver, 20).until(
-                EC.visibility_of_all_elements_located((By.CSS_SELECTOR, "div[class*='timeline-item']"))
-            )
-            tweet_elements = driver.find_elements(By.CSS_SELECTOR, "div[class*='timeline-item']")
-            print(f"Found {len(tweet_elements)} tweet elements")
-        except Exception as e:
-            print(f"Error locating tweets: {e}")
-            if DEBUG_MODE:
-                driver.save_screenshot(f"{SCREENSHOT_DIR}/04_{clean_handle}_scroll_error_{scroll_count}.png")
-                print(f"Screenshot: 04_{clean_handle}_scroll_error_{scroll_count}.png saved")
-            break
+            with run_metrics.timer("scroll", scroll=scroll_count):
+                last_height = driver.execute_script("return document.body.scrollHeight")
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
 
-        if DEBUG_MODE and scroll_count % 10 == 0:
-            driver.save_screenshot(f"{SCREENSHOT_DIR}/04_{clean_handle}_scroll_{scroll_count}.png")
-            print(f"Screenshot: 04_{clean_handle}_scroll_{scroll_count}.png saved")
+                pause_time = SCROLL_PAUSE_TIME + random.uniform(0.3, 1.0)
+                print(f"Waiting {pause_time:.1f} seconds after scroll.")
+                time.sleep(pause_time)
 
-        current_batch = []
-        found_recent_tweet = False
-        print(f"Processing {len(tweet_elements)} tweets.")
+                new_height = driver.execute_script("return document.body.scrollHeight")
+            if new_height == last_height:
+                scroll_attempts += 1
+                print("Scroll detected as ineffective (no new height)")
+            else:
+                scroll_attempts = 0
+                print(f"Scroll effective (new height: {new_height}px)")
 
-        for idx, tweet in enumerate(tweet_elements):
             try:
-                # Robust tweet id extraction
-                try:
-                    tweet_link = tweet.find_element(By.CLASS_NAME, 'tweet-link')
-                    href = tweet_link.get_attribute('href')
-                    tweet_id = href.split('/')[-1].split('#')[0]
-                except Exception:
-                    try:
-                        content_div = tweet.find_element(By.CLASS_NAME, 'tweet-content')
-                        text_snippet = content_div.text[:50].replace('\n', '')
-                        tweet_id = f"temp_{scroll_count}_{idx}_{hash(text_snippet)}"
-                    except Exception:
-                        tweet_id = f"unknown_{scroll_count}_{idx}"
-
-                if tweet_id in seen_tweet_ids:
-                    continue
-                seen_tweet_ids.add(tweet_id)
-
-                # Timestamp
-                try:
-                    date_elem = tweet.find_element(By.CLASS_NAME, 'tweet-date')
-                    title = date_elem.find_element(By.TAG_NAME, 'a').get_attribute('title')
-                    timestamp = parse_timestamp(title)
-                except Exception:
-                    timestamp = datetime.now(timezone.utc)
-
-                if timestamp < cutoff_time:
-                    consecutive_old_tweets += 1
-                    print(f"Skipping old tweet (timestamp: {timestamp})")
-                    continue
-
-                found_recent_tweet = True
-
-                # Handle & text
-                try:
-                    username_elem = tweet.find_element(By.CLASS_NAME, 'username')
-                    user_handle = username_elem.get_attribute('title')
-                except Exception:
-                    user_handle = handle
-
-                try:
-                    content_div = tweet.find_element(By.CLASS_NAME, 'tweet-content')
-                    tweet_text = content_div.text
-                except Exception:
-                    tweet_text = ""
-
-                # ------------- FINANCE-ONLY GATE -------------
-                if STRICT_FINANCE_ONLY and not looks_like_finance(tweet_text):
-                    # Drop political / off-topic / non-finance tweets
-                    continue
-                # ---------------------------------------------
-
-                bias = detect_bias(tweet_text)
-                metrics = extract_metrics(tweet)
-
-                has_media = False
-                try:
-                    tweet.find_element(By.CLASS_NAME, 'attachments')
-                    has_media = True
-                except Exception:
-                    pass
-
-                tweet_data = {
-                    "user": user_handle,
-                    "text": tweet_text,
-                    "bias": bias,
-                    "timestamp": timestamp.isoformat(),
-                    "id": tweet_id,
-                    "metrics": metrics,
-                    "has_media": has_media,
-                }
-
-                current_batch.append(tweet_data)
-                consecutive_old_tweets = 0
-
-            except (StaleElementReferenceException, NoSuchElementException):
-                continue
+                print("Locating tweet elements.")
+                with run_metrics.timer("wait", scroll=scroll_count):
+                    WebDriverWait(driver, 20).until(
+                        EC.visibility_of_all_elements_located((By.CSS_SELECTOR, "div[class*='timeline-item']"))
+                    )
+                with run_metrics.timer("page_source", scroll=scroll_count):
+                    html = capture_timeline(driver)
             except Exception as e:
-                print(f"Error processing tweet: {e}")
+                run_metrics.instance_error(BASE_URL, "timeline_timeout")
+                print(f"Error locating tweets: {e}")
                 if DEBUG_MODE:
-                    driver.save_screenshot(
-                        f"{SCREENSHOT_DIR}/05_{clean_handle}_tweet_error_{scroll_count}_{idx}.png"
-                    )
-                    print(f"Screenshot: 05_{clean_handle}_tweet_error_{scroll_count}_{idx}.png saved")
-                continue
+                    driver.save_screenshot(f"{SCREENSHOT_DIR}/04_{clean_handle}_scroll_error_{scroll_count}.png")
+                    print(f"Screenshot: 04_{clean_handle}_scroll_error_{scroll_count}.png saved")
+                break
 
-        if not found_recent_tweet:
-            consecutive_no_recent_tweets += 1
-            print(f"No recent tweets found in this scroll (consecutive: {consecutive_no_recent_tweets}/3)")
-        else:
-            consecutive_no_recent_tweets = 0
+            if DEBUG_MODE and scroll_count % 10 == 0:
+                with run_metrics.timer("screenshot", scroll=scroll_count):
+                    driver.save_screenshot(f"{SCREENSHOT_DIR}/04_{clean_handle}_scroll_{scroll_count}.png")
+                print(f"Screenshot: 04_{clean_handle}_scroll_{scroll_count}.png saved")
 
-        all_tweets.extend(current_batch)
-        print(f"Added {len(current_batch)} new tweets (total: {len(all_tweets)})")
+            if RECORD_DIR:
+                record_page(clean_handle, scroll_count, html)
+            run_metrics.count("pages", scroll=scroll_count)
+            pipe.put((scroll_count, html))
+            print(f"Queued page {scroll_count} (tweets kept so far: {progress['kept']})")
+            if PRUNE_DOM:
+                with run_metrics.timer("prune", scroll=scroll_count):
+                    run_metrics.count("pruned_items", prune_timeline(driver), scroll=scroll_count)
+            if watchdog is not None:
+                watchdog.check(scroll_count, reopen if progress["cursor"] else None)
 
-        if consecutive_old_tweets > 30:
-            print("30+ consecutive old tweets, stopping collection")
-            break
-        if consecutive_no_recent_tweets >= 3:
-            print("3 consecutive scrolls with no recent tweets, stopping collection")
-            break
-        if len(all_tweets) > 1000:
-            print("Reached 1000 tweet limit, stopping collection")
-            break
-        if time.time() - start_time > 600:
-            print("10 minute timeout reached, stopping collection")
-            break
-        if scroll_attempts > MAX_SCROLL_ATTEMPTS / 2:
-            print("Multiple ineffective scrolls, attempting recovery.")
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)
+            if progress["old"] > 30:
+                print("30+ consecutive old tweets, stopping collection")
+                break
+            if progress["no_recent"] >= 3:
+                print("3 consecutive scrolls with no recent tweets, stopping collection")
+                break
+            if max_pages and scroll_count >= max_pages:
+                print(f"Page budget of {max_pages} reached, stopping collection")
+                break
+            if progress["kept"] >= MAX_TWEETS_PER_HANDLE:
+                print(f"Reached {MAX_TWEETS_PER_HANDLE} tweet limit, stopping collection")
+                break
+            if time.time() - start_time > time_budget:
+                print(f"Time budget of {time_budget:.0f} seconds reached, stopping collection")
+                break
+            if scroll_attempts > MAX_SCROLL_ATTEMPTS / 2:
+                print("Multiple ineffective scrolls, attempting recovery.")
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(5)
+
+    print(f"Finished scrape for {handle} - {progress['kept']} tweets collected")
+    print(f"Scraped {progress['kept']} tweets in {time.time() - start_time:.1f} seconds")
+    return collected if sink is None else progress["kept"]
+
+# ----------------------------
+# Offline replay
+# ----------------------------
+def record_page(handle, page_number, html):
+    handle_dir = os.path.join(RECORD_DIR, handle)
+    os.makedirs(handle_dir, exist_ok=True)
+    with open(os.path.join(handle_dir, f"page_{page_number:03d}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
 
-    print(f"Finished scrape for {handle} - {len(all_tweets)} tweets collected")
-    print(f"Scraped {len(all_tweets)} tweets in {time.time() - start_time:.1f} seconds")
-    return all_tweets
+def find_saved_pages(path):
+    """Saved ``.html`` pages under ``path`` (a file or directory), in name order."""
+    if os.path.isfile(path):
+        return [path]
+    pages = []
+    for root, _dirs, files in os.walk(path):
+        pages.extend(os.path.join(root, f) for f in files if f.endswith((".html", ".htm")))
+    return sorted(pages)
+
+def read_saved_pages(paths):
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield f.read()
+
+def replay_pages(pages, handle="", cutoff_time=None, sink=None):
+    """Run page sources through the scraper's parse, gate and bias stages.
+
+    No browser or network is involved. Pages are replayed in the order given,
+    sharing one set of seen tweet ids like consecutive scrolls of one timeline.
+    Returns the kept tweets, or their count when ``sink`` is given.
+    """
+    if cutoff_time is None:
+        cutoff_time = datetime.min.replace(tzinfo=timezone.utc)
+    collected = []
+    progress = {"old": 0, "no_recent": 0, "kept": 0}
+    emit = collected.append if sink is None else sink
+    with timeline_pipeline(handle, cutoff_time, progress, emit) as pipe:
+        for page_number, html in enumerate(pages, 1):
+            pipe.put((page_number, html))
+    return collected if sink is None else progress["kept"]
+
+def replay(path, output_file=None, handle="", hours=None):
+    pages = find_saved_pages(path)
+    if not pages:
+        print(f"No saved .html pages found in {path}")
+        return
+    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours) if hours else None
+    t0 = time.time()
+    if output_file:
+        with open_output(output_file) as writer:
+            count = replay_pages(read_saved_pages(pages), handle, cutoff_time,
+                                 sink=lambda tweet: writer.write(simplify_tweet(tweet)))
+        print(f"Tweets saved to {output_file}")
+    else:
+        count = len(replay_pages(read_saved_pages(pages), handle, cutoff_time))
+    elapsed = time.time() - t0
+    print(f"Replayed {len(pages)} pages in {elapsed:.2f} seconds: {count} tweets kept "
+          f"({len(pages) / max(elapsed, 1e-9):.1f} pages/sec)")
+    if _classification_cache is not None:
+        _classification_cache.flush()
 
 # ----------------------------
 # Output
 # ----------------------------
-def save_tweets_to_json(tweets, filename="tweets_with_bias.json"):
+def save_tweets_to_json(tweets, filename="tweets_with_bias.json", compact=None):
     """Save tweets to JSON file in the requested format, including tweet ID."""
+    if compact is None:
+        compact = OUTPUT_COMPACT
     output_dir = os.path.dirname(filename)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    simplified_tweets = [
-        {
-            "user": tweet["user"],
-            "text": tweet["text"],
-            "bias": tweet["bias"] if tweet["bias"] else "None",
-            "id": tweet["id"],
-        }
-        for tweet in tweets
-    ]
+    simplified_tweets = [simplify_tweet(tweet) for tweet in tweets]
 
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(simplified_tweets, f, indent=2, ensure_ascii=False)
+    codec.write_json(simplified_tweets, filename, compact=compact)
     print(f"Tweets saved to {filename}")
 
+def simplify_tweet(tweet):
+    """The subset of a scraped tweet that is written to the output file."""
+    return {
+        "user": tweet["user"],
+        "text": tweet["text"],
+        "bias": tweet["bias"] if tweet["bias"] else "None",
+        "id": tweet["id"],
+        "tickers": tweet.get("tickers", []),
+    }
+
+def open_output(filename, compact=None):
+    """Streaming counterpart of ``save_tweets_to_json``: call ``.write(tweet)`` per tweet."""
+    if compact is None:
+        compact = OUTPUT_COMPACT
+    output_dir = os.path.dirname(filename)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    return codec.JSONArrayWriter(filename, compact=compact)
+
+def update_archive_stores():
+    """Fold the newest snapshots into the derived stores (time series, text index)."""
+    stores = []
+    if UPDATE_AGGREGATES:
+        stores.append(("Bias time series", aggregates.BiasTimeSeries))
+    if UPDATE_TEXT_INDEX:
+        stores.append(("Text index", text_index.TextIndex))
+    for name, store_cls in stores:
+        try:
+            store = store_cls()
+            print(f"{name} updated with {store.update()} new tweets")
+            store.close()
+        except Exception as e:
+            print(f"Error updating {name.lower()}: {type(e).__name__}: {e}")
+
 # ----------------------------
 # Main
 # ----------------------------
-def main():
+def _terminate(signum, frame):
+    # Turn SIGTERM (CI timeouts, ``timeout``, ``docker stop``) into an ordinary
+    # exit so the output and checkpoint are written on the way out.
+    raise SystemExit(128 + signum)
+
+def main(resume=True):
     print("Starting Twitter scraper with bias detection + finance-only filter.")
+    signal.signal(signal.SIGTERM, _terminate)
+
+    # Handles are worked off in priority order within the run's time budget.
+    state = scheduler.load_run_state()
+    if state.get("carried_over"):
+        print(f"Catching up on handles the last run did not finish: {', '.join(state['carried_over'])}")
+    work = scheduler.WorkQueue(CREATOR_HANDLES, scheduler.learn_posting_rates(CREATOR_HANDLES), state)
 
     # Output filename
     output_file = os.getenv("OUTPUT_FILE", "data/tweets_with_bias.json")
@@ -461,39 +909,264 @@ def main():
         HEADLESS_MODE = True
         print("Running in headless mode")
 
+    if metrics.METRICS_PORT:
+        metrics.serve(run_metrics)
+        print(f"Serving metrics at http://{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics")
+
     # Choose Nitter base
     global BASE_URL
     BASE_URL = test_nitter_instances()
     print(f"Using Nitter instance: {BASE_URL}")
 
-    driver = setup_driver()
+    metrics_file = METRICS_FILE or run_metrics.default_path()
+    watchdog = DriverWatchdog()
+    watchdog.start()
     print("Driver initialized with stealth settings")
 
     time_threshold = calculate_time_threshold()
+    # Every kept tweet goes to the checkpoint first; the output file is built
+    # from it at the end, or on the way out of an interrupted run. A recent
+    # checkpoint from an interrupted run is resumed: same output file and
+    # cutoff, finished handles skipped, the interrupted one continued from its
+    # last cursor.
+    run, resumed = checkpoint.Checkpoint.open(output_file, time_threshold, resume=resume)
+    if resumed:
+        output_file, time_threshold = run.output_file, run.cutoff_time
+        print(f"Resuming interrupted run into {output_file} "
+              f"({len(run.state['completed'])} handles already done)")
+        work.skip(run.state["completed"])
     print(f"Scraping tweets since: {time_threshold.strftime('%Y-%m-%d %H:%M UTC')}")
+    resumed_ids = run.seen_ids()
 
-    all_tweets = []
-    for handle in CREATOR_HANDLES:
-        try:
-            print(f"\nScraping {handle}.")
-            t0 = time.time()
-            tweets = scrape_creator_tweets(driver, handle, time_threshold)
-            print(f"Scraped {len(tweets)} tweets in {time.time() - t0:.1f} seconds")
-            all_tweets.extend(tweets)
-            delay = random.uniform(5, 15)
-            print(f"Waiting {delay:.1f} seconds before next account.")
-            time.sleep(delay)
-        except Exception as e:
-            print(f"Error scraping {handle}: {type(e).__name__}: {e}")
-            if DEBUG_MODE:
-                traceback.print_exc()
+    total_tweets = 0
+    write_tweet = lambda tweet: run.add(simplify_tweet(tweet))
+    try:
+        for handle, budget in work:
+            try:
+                if watchdog.driver is None:
+                    watchdog.start()
+                cursor = run.cursor(handle)
+                print(f"\nScraping {handle} (budget {budget:.0f} seconds"
+                      + (f", resuming at {cursor})." if cursor else ")."))
+                t0 = time.time()
+                with run_metrics.scrape(handle):
+                    count = scrape_creator_tweets(watchdog.driver, handle, time_threshold, sink=write_tweet,
+                                                  seen_tweet_ids=set(resumed_ids), time_budget=budget,
+                                                  start_cursor=cursor,
+                                                  on_cursor=lambda c, h=handle: run.set_cursor(h, c),
+                                                  watchdog=watchdog)
+                elapsed = time.time() - t0
+                print(f"Scraped {count} tweets in {elapsed:.1f} seconds")
+                total_tweets += count
+                run.complete(handle)
+                work.done(handle, count, finished=elapsed <= budget)
+                delay = random.uniform(5, 15)
+                print(f"Waiting {delay:.1f} seconds before next account.")
+                with run_metrics.timer("delay"):
+                    time.sleep(delay)
+            except Exception as e:
+                run_metrics.count("handle_errors")
+                work.done(handle, 0, finished=False)
+                print(f"Error scraping {handle}: {type(e).__name__}: {e}")
+                if DEBUG_MODE:
+                    traceback.print_exc()
+            watchdog.recycle_if_needed()
+            # Rewritten after every handle so a timed-out run still leaves a report.
+            run_metrics.write(metrics_file)
+            scheduler.save_run_state(work.state)
+    except BaseException:
+        written = run.finalize(OUTPUT_COMPACT)
+        print(f"\nInterrupted: {written} tweets saved to {output_file}; "
+              f"the next run resumes from {run.state_path}")
+        watchdog.quit()
+        run_metrics.write(metrics_file)
+        raise
 
-    save_tweets_to_json(all_tweets, output_file)
-    print(f"Total tweets collected: {len(all_tweets)}")
+    written = run.finalize(OUTPUT_COMPACT)
+    run.clear()
+    scheduler.save_run_state(work.finish())
+    if work.state["carried_over"]:
+        print(f"Carried over to the next run: {', '.join(work.state['carried_over'])}")
 
-    driver.quit()
+    print(f"Tweets saved to {output_file}")
+    print(f"Total tweets collected: {total_tweets}" + (f" ({written} including the interrupted run)" if resumed else ""))
+    memo_stats = _analysis_memo.stats()
+    print(f"Analysis memo: {memo_stats['hits']} hits, {memo_stats['misses']} misses")
+    if _classification_cache is not None:
+        _classification_cache.flush()
+        stats = _classification_cache.stats()
+        print(f"Classification cache: {stats['hits']} hits, {stats['misses']} misses")
+
+    with run_metrics.timer("update_stores"):
+        update_archive_stores()
+
+    watchdog.quit()
+    run_metrics.write(metrics_file)
+    print(run_metrics.summary())
+    print(f"Run metrics saved to {metrics_file}")
     print(f"\nScraping completed. Tweets saved to {output_file}")
     print(f"Time range covered: {time_threshold.strftime('%Y-%m-%d %H:%M')} to {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M')} UTC")
 
+# ----------------------------
+# Daemon mode
+# ----------------------------
+SERVE_FLUSH_SECONDS = float(os.getenv("SERVE_FLUSH_SECONDS", "900"))
+# The idle loop sleeps at most flush_seconds, so 0 would make it spin.
+SERVE_MIN_FLUSH_SECONDS = 1.0
+
+class SnapshotBatch:
+    """Buffers tweets from many polls and writes them as timestamped snapshots in data/."""
+
+    def __init__(self, data_dir=archive.ARCHIVE_DIR, flush_seconds=SERVE_FLUSH_SECONDS):
+        self.data_dir = data_dir
+        self.flush_seconds = max(flush_seconds, SERVE_MIN_FLUSH_SECONDS)
+        self.tweets = []
+        self.last_flush = time.time()
+
+    def add(self, tweet):
+        self.tweets.append(simplify_tweet(tweet))
+
+    def flush_if_due(self):
+        if time.time() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.time()
+        if not self.tweets:
+            return None
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        filename = os.path.join(self.data_dir, f"tweets_with_bias_{stamp}.json")
+        save_tweets_to_json(self.tweets, filename)
+        self.tweets = []
+        if _classification_cache is not None:
+            _classification_cache.flush()
+        with run_metrics.timer("update_stores"):
+            update_archive_stores()
+        return filename
+
+def prune_seen_ids(seen_tweet_ids, cutoff_time):
+    """Forget ids older than the scrape window; they can no longer come back as recent.
+
+    ``temp_``/``unknown_`` ids carry no time and only name a position on one
+    poll's pages, so they are dropped after every poll.
+    """
+    for tweet_id in list(seen_tweet_ids):
+        posted = archive.snowflake_time(tweet_id)
+        if posted is None or posted < cutoff_time:
+            seen_tweet_ids.discard(tweet_id)
+
+def recent_timeline_items(handle):
+    """Timeline items within the cutoff that ``handle``'s polls went through so far, kept or not."""
+    counters = run_metrics.handles.get(handle, {}).get("counters", {})
+    return counters.get("tweets_seen", 0) - counters.get("tweets_old", 0)
+
+def archived_ids_since(cutoff_time, data_dir=archive.ARCHIVE_DIR):
+    """Ids of archived tweets posted after ``cutoff_time``, so a restarted daemon skips them."""
+    ids = set()
+    for tweet in archive.ArchiveReader(data_dir).iter_tweets():
+        posted = archive.snowflake_time(tweet.get("id"))
+        if posted is not None and posted >= cutoff_time:
+            ids.add(str(tweet["id"]))
+    return ids
+
+def serve():
+    """Poll every handle forever on its own adaptive interval, reusing one browser session."""
+    print("Starting scraper daemon.")
+    global BASE_URL
+    if metrics.METRICS_PORT:
+        metrics.serve(run_metrics)
+        print(f"Serving metrics at http://{metrics.METRICS_HOST}:{metrics.METRICS_PORT}/metrics")
+
+    rates = scheduler.learn_posting_rates(CREATOR_HANDLES)
+    schedule = scheduler.Scheduler(CREATOR_HANDLES, rates)
+    for handle in CREATOR_HANDLES:
+        print(f"{handle}: {rates[handle] * 24:.1f} tweets/day in the archive, "
+              f"polling every {schedule.states[handle].interval / 60:.0f} minutes")
+    batch = SnapshotBatch()
+    # One set for all handles: ids are global, and retweets show up on several timelines.
+    known_ids = archived_ids_since(calculate_time_threshold())
+    window = (datetime.now(timezone.utc) - calculate_time_threshold()).total_seconds()
+    metrics_file = METRICS_FILE or run_metrics.default_path()
+    watchdog = DriverWatchdog()
+    try:
+        while True:
+            handle, wait = schedule.next()
+            if wait > 0:
+                batch.flush_if_due()
+                time.sleep(min(wait, batch.flush_seconds))
+                continue
+
+            if watchdog.driver is None:
+                BASE_URL = test_nitter_instances()
+                print(f"Using Nitter instance: {BASE_URL}")
+                watchdog.start()
+
+            cutoff_time = calculate_time_threshold()
+            first_poll = schedule.states[handle].last_poll is None
+            max_pages = schedule.page_budget(handle, window=window if first_poll else None)
+            count = 0
+            items_before = recent_timeline_items(handle)
+            try:
+                with run_metrics.scrape(handle):
+                    count = scrape_creator_tweets(watchdog.driver, handle, cutoff_time, sink=batch.add,
+                                                  seen_tweet_ids=known_ids, max_pages=max_pages,
+                                                  watchdog=watchdog)
+            except Exception as e:
+                run_metrics.count("handle_errors")
+                print(f"Error scraping {handle}: {type(e).__name__}: {e}; restarting the browser")
+                if DEBUG_MODE:
+                    traceback.print_exc()
+                watchdog.quit()
+            watchdog.recycle_if_needed()
+            prune_seen_ids(known_ids, cutoff_time)
+            interval = schedule.record(handle, count, window=window if first_poll else None,
+                                       timeline_items=recent_timeline_items(handle) - items_before)
+            print(f"{handle}: {count} new tweets, next poll in {interval / 60:.0f} minutes")
+            batch.flush_if_due()
+            run_metrics.write(metrics_file)
+    except KeyboardInterrupt:
+        print("Stopping scraper daemon.")
+    finally:
+        batch.flush()
+        watchdog.quit()
+        run_metrics.write(metrics_file)
+
+def run_cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Behavioral bias tweet classifier.")
+    sub = parser.add_subparsers(dest="command")
+    scrape_cmd = sub.add_parser("scrape", help="Scrape all handles once (default)")
+    scrape_cmd.add_argument("--fresh", action="store_true",
+                            help="Ignore the checkpoint of an interrupted run and start over")
+    sub.add_parser("serve", help="Run continuously, polling each handle on an adaptive schedule")
+    compact = sub.add_parser("compact", help="Roll daily snapshots into monthly compressed segments")
+    compact.add_argument("--data-dir", default=archive.ARCHIVE_DIR)
+    compact.add_argument("--include-current", action="store_true",
+                         help="Also compact the current (still growing) month")
+    compact.add_argument("--keep", action="store_true", help="Keep the daily files after compacting")
+    replay_cmd = sub.add_parser("replay", help="Classify saved Nitter HTML pages without a browser")
+    replay_cmd.add_argument("path", help="Directory (searched recursively) or single .html file")
+    replay_cmd.add_argument("--output", help="Write kept tweets to this JSON file")
+    replay_cmd.add_argument("--handle", default="", help="Handle to use when a page lacks one")
+    replay_cmd.add_argument("--hours", type=float,
+                            help="Apply the scraper's recency cutoff (default: keep every tweet)")
+    replay_cmd.add_argument("--no-cache", action="store_true",
+                            help="Bypass the classification cache, e.g. when timing classification")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.command == "replay":
+        if args.no_cache:
+            global CLASSIFICATION_CACHE
+            CLASSIFICATION_CACHE = False
+        replay(args.path, args.output, args.handle, args.hours)
+    elif args.command == "serve":
+        serve()
+    elif args.command == "compact":
+        archive.compact_archive(args.data_dir, include_current=args.include_current,
+                                keep_sources=args.keep)
+    else:
+        main(resume=not getattr(args, "fresh", False))
+
 if __name__ == "__main__":
-    main()
+    run_cli()
@@ -0,0 +1,256 @@
+"""Structured timers and counters for a scraper run.
+
+``RunMetrics`` accumulates stage timings (count, total, max seconds) and
+counters at three levels: the whole run, each handle and each scroll (page) of
+a handle. Stages may run on pipeline threads, so every update takes a lock.
+``write()`` dumps everything as one JSON report and can be called repeatedly,
+so a run killed by a CI timeout still leaves the numbers up to its last handle.
+
+For long-running scrapers ``serve()`` exposes the same numbers over HTTP in the
+Prometheus text format (or OpenMetrics, if the scraper asks for it): stage
+latency histograms, event counters and per-Nitter-instance error counters.
+"""
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import codec
+
+METRICS_DIR = os.getenv("METRICS_DIR", "metrics")
+# Port for the /metrics endpoint; unset disables it.
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Seconds; spans sub-millisecond parsing up to the 20 s WebDriverWait timeout.
+LATENCY_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _stage_totals():
+    return {"count": 0, "total": 0.0, "max": 0.0}
+
+
+def _add_timing(stages, stage, seconds):
+    totals = stages.setdefault(stage, _stage_totals())
+    totals["count"] += 1
+    totals["total"] += seconds
+    totals["max"] = max(totals["max"], seconds)
+
+
+def _rounded(stages):
+    return {name: {"count": s["count"], "total": round(s["total"], 4), "max": round(s["max"], 4)}
+            for name, s in stages.items()}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = Counter()
+        self.handles = {}
+        self.handle = None  # handle currently being scraped
+        self.histograms = {}
+        self.instance_errors = Counter()  # (instance, reason) -> count
+
+    # ---------- recording ----------
+    def _handle_record(self):
+        record = self.handles.get(self.handle)
+        if record is None and self.handle is not None:
+            record = self.handles[self.handle] = {
+                "duration": 0.0, "stages": {}, "counters": Counter(), "scrolls": {},
+            }
+        return record
+
+    def observe(self, stage, seconds, scroll=None):
+        """Record one timing of ``stage``, optionally attributed to a scroll number."""
+        with self._lock:
+            _add_timing(self.stages, stage, seconds)
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+            record = self._handle_record()
+            if record is not None:
+                _add_timing(record["stages"], stage, seconds)
+                if scroll is not None:
+                    page = record["scrolls"].setdefault(scroll, Counter())
+                    page[stage] += seconds
+
+    def count(self, name, n=1, scroll=None):
+        with self._lock:
+            self.counters[name] += n
+            record = self._handle_record()
+            if record is not None:
+                record["counters"][name] += n
+                if scroll is not None:
+                    record["scrolls"].setdefault(scroll, Counter())[name] += n
+
+    def instance_error(self, instance, reason):
+        """Count a failure (unreachable, navigation, timeline_timeout, ...) against a Nitter instance."""
+        with self._lock:
+            self.instance_errors[(instance, reason)] += 1
+
+    @contextmanager
+    def timer(self, stage, scroll=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0, scroll)
+
+    @contextmanager
+    def scrape(self, handle):
+        """Attribute everything recorded inside the block to ``handle``."""
+        self.handle = handle
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                record = self._handle_record()
+                record["duration"] += time.perf_counter() - t0
+                self.handle = None
+
+    def count_webdriver_calls(self, driver):
+        """Count every WebDriver command ``driver`` sends (all of them go through ``execute``)."""
+        execute = driver.execute
+
+        def counted_execute(command, params=None):
+            self.count("webdriver_calls")
+            return execute(command, params)
+
+        driver.execute = counted_execute
+        return driver
+
+    # ---------- reporting ----------
+    def default_path(self):
+        return os.path.join(METRICS_DIR, f"run_{self.started:%Y-%m-%d_%H-%M-%S}.json")
+
+    def report(self):
+        with self._lock:
+            return {
+                "started": self.started.isoformat(timespec="seconds"),
+                "duration": round(time.perf_counter() - self._t0, 3),
+                "stages": _rounded(self.stages),
+                "counters": dict(self.counters),
+                "instance_errors": [
+                    {"instance": instance, "reason": reason, "count": n}
+                    for (instance, reason), n in sorted(self.instance_errors.items())
+                ],
+                "handles": {
+                    handle: {
+                        "duration": round(record["duration"], 3),
+                        "stages": _rounded(record["stages"]),
+                        "counters": dict(record["counters"]),
+                        "scrolls": [
+                            {"number": n, **{k: round(v, 4) if isinstance(v, float) else v
+                                             for k, v in page.items()}}
+                            for n, page in sorted(record["scrolls"].items())
+                        ],
+                    }
+                    for handle, record in self.handles.items()
+                },
+            }
+
+    def write(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        codec.write_json(self.report(), path)
+
+    def summary(self, top=8):
+        """Short text table of the slowest stages, for the end of the console log."""
+        report = self.report()
+        lines = [f"Run took {report['duration']:.1f} seconds"]
+        for name, s in sorted(report["stages"].items(), key=lambda kv: -kv[1]["total"])[:top]:
+            lines.append(f"  {name:<14} {s['total']:9.2f} s  over {s['count']:>6} calls  (max {s['max']:.2f} s)")
+        lines.append("  " + ", ".join(f"{k}={v}" for k, v in sorted(report["counters"].items())))
+        return "\n".join(lines)
+
+
+# ----------------------------
+# Prometheus / OpenMetrics endpoint
+# ----------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def exposition(run_metrics, openmetrics=False):
+    """Render ``run_metrics`` in the Prometheus text format, or OpenMetrics."""
+    def family(name, kind, help_text):
+        # OpenMetrics names a counter family without its _total suffix.
+        declared = name[:-len("_total")] if openmetrics and kind == "counter" else name
+        return [f"# HELP {declared} {help_text}", f"# TYPE {declared} {kind}"]
+
+    with run_metrics._lock:
+        lines = family("scraper_stage_seconds", "histogram",
+                       "Latency of each scraper stage (navigation is page load).")
+        for stage, h in sorted(run_metrics.histograms.items()):
+            for bound, n in zip(h.buckets, h.counts):
+                lines.append(f'scraper_stage_seconds_bucket{{stage="{_label(stage)}",le="{bound}"}} {n}')
+            lines.append(f'scraper_stage_seconds_bucket{{stage="{_label(stage)}",le="+Inf"}} {h.count}')
+            lines.append(f'scraper_stage_seconds_sum{{stage="{_label(stage)}"}} {h.sum:.6f}')
+            lines.append(f'scraper_stage_seconds_count{{stage="{_label(stage)}"}} {h.count}')
+
+        lines += family("scraper_events_total", "counter",
+                        "Scraper events: pages, tweets_seen, dropped_by_gate, labelled, webdriver_calls, ...")
+        for name, n in sorted(run_metrics.counters.items()):
+            lines.append(f'scraper_events_total{{event="{_label(name)}"}} {n}')
+
+        lines += family("nitter_instance_errors_total", "counter", "Failures per Nitter instance and reason.")
+        for (instance, reason), n in sorted(run_metrics.instance_errors.items()):
+            lines.append(f'nitter_instance_errors_total{{instance="{_label(instance)}",reason="{_label(reason)}"}} {n}')
+
+        lines += family("scraper_start_time_seconds", "gauge", "Unix time the scraper started.")
+        lines.append(f"scraper_start_time_seconds {run_metrics.started.timestamp():.0f}")
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = exposition(self.server.run_metrics, openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8"
+                         if openmetrics else "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(run_metrics, port=METRICS_PORT, host=METRICS_HOST):
+    """Serve ``/metrics`` from a daemon thread; returns the server (``.shutdown()`` to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.run_metrics = run_metrics
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    return server
@@ -0,0 +1,154 @@
+"""Parse Nitter timeline HTML into raw tweet fields without a browser.
+
+``parse_timeline(html)`` mirrors what ``scrape_creator_tweets`` reads from the
+live DOM for each ``timeline-item``: the status link, ``@handle``, date title,
+tweet text, engagement stats and whether media is attached. Quoted tweets are
+ignored, as the first-match element lookups in the scraper would.
+"""
+import re
+from html.parser import HTMLParser
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+             "link", "meta", "source", "track", "wbr"}
+
+STAT_ICONS = {
+    "icon-comment": "replies",
+    "icon-retweet": "retweets",
+    "icon-quote": "quotes",
+    "icon-heart": "likes",
+    "icon-play": "views",
+}
+
+NUMBER_REGEX = re.compile(r"[\d,]+")
+
+
+def empty_metrics():
+    return {"replies": 0, "retweets": 0, "quotes": 0, "likes": 0, "views": 0}
+
+
+def parse_stat(text: str, icon_classes: str):
+    """Map one ``tweet-stat`` to (metric name, value), or None."""
+    numbers = NUMBER_REGEX.findall(text or "")
+    value = int(numbers[0].replace(",", "")) if numbers else 0
+    for icon, name in STAT_ICONS.items():
+        if icon in icon_classes:
+            return name, value
+    return None
+
+
+class _TimelineParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = []
+        self.show_more = None
+        self._stack = []       # class lists of open elements
+        self._item = None      # tweet being built
+        self._item_depth = 0
+        self._quote_depth = 0  # >0 while inside a quoted tweet
+        self._capture = None   # ("text", depth) / ("stat", depth)
+        self._buf = []
+        self._stat_icons = ""
+        self._show_more_depth = 0
+
+    # ---------- helpers ----------
+    def _in(self, cls):
+        return any(cls in classes for classes in self._stack)
+
+    def _finish_capture(self):
+        kind, _depth = self._capture
+        text = "".join(self._buf)
+        if kind == "text":
+            self._item["text"] = text.strip()
+        else:
+            stat = parse_stat(text, self._stat_icons)
+            if stat:
+                self._item["metrics"][stat[0]] = stat[1]
+        self._capture = None
+        self._buf = []
+
+    # ---------- HTMLParser callbacks ----------
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if tag == "br":
+            if self._capture and self._capture[0] == "text":
+                self._buf.append("\n")
+            return
+
+        if self._item is None:
+            if "show-more" in classes:
+                self._show_more_depth = len(self._stack) + 1
+            elif self._show_more_depth and tag == "a":
+                # The bottom "Load more" link carries the pagination cursor.
+                if "cursor=" in (attrs.get("href") or ""):
+                    self.show_more = attrs.get("href")
+            elif tag == "div" and any("timeline-item" in c for c in classes):
+                self._item = {"href": None, "user": None, "date_title": None, "text": None,
+                              "metrics": empty_metrics(), "has_media": False}
+                self._item_depth = len(self._stack) + 1
+        elif not self._quote_depth:
+            item = self._item
+            if "quote" in classes:
+                self._quote_depth = len(self._stack) + 1
+            elif tag == "a" and "tweet-link" in classes and item["href"] is None:
+                item["href"] = attrs.get("href")
+            elif "username" in classes and item["user"] is None:
+                item["user"] = attrs.get("title")
+            elif tag == "a" and self._in("tweet-date") and item["date_title"] is None:
+                item["date_title"] = attrs.get("title")
+            elif "tweet-content" in classes and item["text"] is None and not self._capture:
+                self._capture = ("text", len(self._stack) + 1)
+            elif "attachments" in classes:
+                item["has_media"] = True
+            elif "tweet-stat" in classes and not self._capture:
+                self._capture = ("stat", len(self._stack) + 1)
+                self._stat_icons = ""
+            elif self._capture and self._capture[0] == "stat":
+                self._stat_icons += " " + " ".join(classes)
+
+        if tag not in VOID_TAGS:
+            self._stack.append(classes)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or not self._stack:
+            return
+        depth = len(self._stack)
+        if self._capture and self._capture[1] == depth:
+            self._finish_capture()
+        if self._quote_depth == depth:
+            self._quote_depth = 0
+        if self._show_more_depth == depth:
+            self._show_more_depth = 0
+        if self._item is not None and self._item_depth == depth:
+            self.items.append(self._item)
+            self._item = None
+        self._stack.pop()
+
+    def handle_data(self, data):
+        if self._capture:
+            self._buf.append(data)
+
+
+def parse_timeline(html: str):
+    """Return (items, show_more_href) for a Nitter timeline page.
+
+    Each item is a dict with href, user, date_title, text, metrics and
+    has_media; missing fields are None.
+    """
+    parser = _TimelineParser()
+    parser.feed(html or "")
+    parser.close()
+    return parser.items, parser.show_more
+
+
+def tweet_id_from_href(href):
+    """"/user/status/123#m" -> "123"."""
+    if not href:
+        return None
+    return href.split("/")[-1].split("#")[0] or None
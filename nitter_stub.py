@@ -0,0 +1,260 @@
+"""Local Nitter stand-in that serves recorded timelines over HTTP.
+
+Fixtures come from pages recorded by the scraper (``RECORD_DIR``, one
+sub-directory per handle) or from the tweet archive in ``data/``. Timelines are
+served ``--page-size`` tweets at a time with Nitter's ``?cursor=`` pagination,
+plus a small infinite-scroll script so the scraper's scroll loop keeps loading
+pages. Latency and error responses can be injected to make load tests
+reproducible::
+
+    python nitter_stub.py --pages recordings/ --port 8080 --latency 0.2 --error-rate 0.05
+    NITTER_BASE_URL=http://127.0.0.1:8080 python main.py
+"""
+import html
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import archive
+import nitter_html
+
+DATE_TITLE_FORMAT = "%b %d, %Y · %I:%M %p UTC"
+
+# Appends the next page's items when the bottom of the timeline is reached,
+# the way Nitter's own infinite-scroll option does.
+INFINITE_SCROLL_JS = """
+window.addEventListener("scroll", function () {
+  var more = document.querySelector(".show-more a");
+  if (!more || more.dataset.loading || window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+  more.dataset.loading = "1";
+  fetch(more.href).then(function (r) { return r.text(); }).then(function (text) {
+    var doc = new DOMParser().parseFromString(text, "text/html");
+    var timeline = document.querySelector(".timeline");
+    var oldMore = document.querySelector(".show-more");
+    doc.querySelectorAll(".timeline-item").forEach(function (item) { timeline.insertBefore(item, oldMore); });
+    var newMore = doc.querySelector(".show-more");
+    if (newMore) { oldMore.replaceWith(newMore); } else { oldMore.remove(); }
+  }).catch(function () { delete more.dataset.loading; });
+});
+"""
+
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+def load_recorded_pages(root):
+    """{handle: [item, ...]} from ``root/<handle>/*.html``, newest first, deduplicated."""
+    timelines = {}
+    for handle in sorted(os.listdir(root)):
+        handle_dir = os.path.join(root, handle)
+        if not os.path.isdir(handle_dir):
+            continue
+        items = OrderedDict()
+        for name in sorted(os.listdir(handle_dir)):
+            if not name.endswith((".html", ".htm")):
+                continue
+            with open(os.path.join(handle_dir, name), encoding="utf-8", errors="replace") as f:
+                page_items, _ = nitter_html.parse_timeline(f.read())
+            for item in page_items:
+                items.setdefault(item["href"] or item["text"], item)
+        timelines[archive.normalize_handle(handle)] = list(items.values())
+    return timelines
+
+
+def load_archive(root=archive.ARCHIVE_DIR):
+    """{handle: [item, ...]} built from archived tweets, newest first by snowflake id."""
+    timelines = {}
+    seen = set()
+    for tweet in archive.ArchiveReader(root).iter_tweets():
+        tweet_id = str(tweet.get("id") or "")
+        if not tweet_id.isdigit() or tweet_id in seen:
+            continue  # only real ids carry a timestamp
+        seen.add(tweet_id)
+        user = tweet.get("user", "").lstrip("@")
+        posted = archive.snowflake_time(tweet_id)
+        timelines.setdefault(archive.normalize_handle(user), []).append({
+            "href": f"/{user}/status/{tweet_id}#m",
+            "user": f"@{user}",
+            "date_title": posted.strftime(DATE_TITLE_FORMAT),
+            "text": tweet.get("text", ""),
+            "metrics": nitter_html.empty_metrics(),
+            "has_media": False,
+        })
+    for items in timelines.values():
+        items.sort(key=lambda item: int(nitter_html.tweet_id_from_href(item["href"])), reverse=True)
+    return timelines
+
+
+def rebase_dates(timelines, now=None):
+    """Shift every date so the newest fixture tweet was posted ``now``.
+
+    Keeps old recordings inside the scraper's recency window.
+    """
+    stamps = [_posted(item) for items in timelines.values() for item in items if item["date_title"]]
+    stamps = [s for s in stamps if s is not None]
+    if not stamps:
+        return timelines
+    offset = (now or datetime.now(timezone.utc)) - max(stamps)
+    for items in timelines.values():
+        for item in items:
+            posted = _posted(item) if item["date_title"] else None
+            if posted is not None:
+                item["date_title"] = (posted + offset).strftime(DATE_TITLE_FORMAT)
+    return timelines
+
+
+def _posted(item):
+    try:
+        return datetime.strptime(item["date_title"], DATE_TITLE_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+# ----------------------------
+# Rendering
+# ----------------------------
+def render_item(item):
+    esc = html.escape
+    user = (item["user"] or "").lstrip("@")
+    href = esc(item["href"] or "")
+    text = "<br>".join(esc(line) for line in (item["text"] or "").split("\n"))
+    stats = "".join(
+        f'<span class="tweet-stat"><div class="icon-container"><span class="{icon}"></span> {item["metrics"].get(name, 0):,}</div></span>'
+        for icon, name in nitter_html.STAT_ICONS.items()
+    )
+    return (
+        '<div class="timeline-item ">'
+        + (f'<a class="tweet-link" href="{href}"></a>' if href else "")
+        + '<div class="tweet-body"><div class="tweet-header">'
+        + f'<a class="username" href="/{esc(user)}" title="@{esc(user)}">@{esc(user)}</a>'
+        + f'<span class="tweet-date"><a href="{href}" title="{esc(item["date_title"] or "")}"></a></span>'
+        + "</div>"
+        + f'<div class="tweet-content media-body" dir="auto">{text}</div>'
+        + ('<div class="attachments"></div>' if item["has_media"] else "")
+        + f'<div class="tweet-stats">{stats}</div>'
+        + "</div></div>\n"
+    )
+
+
+def render_page(title, items, next_cursor=None):
+    more = f'<div class="show-more"><a href="?cursor={next_cursor}">Load more</a></div>' if next_cursor else ""
+    return (
+        f"<html><head><title>{html.escape(title)} | nitter</title></head><body>"
+        f'<div class="timeline">\n{"".join(render_item(i) for i in items)}{more}</div>'
+        f"<script>{INFINITE_SCROLL_JS}</script></body></html>"
+    )
+
+
+def render_error(message):
+    return (f'<html><head><title>Error | nitter</title></head><body>'
+            f'<div class="error-panel"><span>{html.escape(message)}</span></div></body></html>')
+
+
+# ----------------------------
+# Server
+# ----------------------------
+class NitterStub(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fixtures and fault-injection settings."""
+
+    daemon_threads = True
+
+    def __init__(self, address, timelines, page_size=20, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=503, seed=None):
+        super().__init__(address, StubHandler)
+        self.timelines = timelines
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread; returns self for ``stub = NitterStub(...).start()``."""
+        threading.Thread(target=self.serve_forever, name="nitter-stub", daemon=True).start()
+        return self
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        url = urlsplit(self.path)
+        path = url.path.strip("/")
+        if not path:
+            # The scraper's instance check; faults here would only send it to
+            # the live mirrors instead of exercising its retries.
+            return self._send(200, render_page("nitter", []))
+
+        delay = server.latency + server.random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        if server.error_rate and server.random.random() < server.error_rate:
+            server.errors += 1
+            return self._send(server.error_status, render_error("Instance has been rate limited."))
+
+        handle = archive.normalize_handle(path.split("/")[0])
+        items = server.timelines.get(handle)
+        if items is None or "/" in path:
+            return self._send(404, render_error(f"User \"{handle}\" not found"))
+        try:
+            start = int(parse_qs(url.query).get("cursor", ["0"])[0])
+        except ValueError:
+            return self._send(400, render_error("Invalid cursor"))
+        end = start + server.page_size
+        self._send(200, render_page(f"@{handle}", items[start:end], end if end < len(items) else None))
+
+    def _send(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # one line per request drowns out the scraper's own output
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve recorded timelines as a local Nitter instance.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pages", help="Recorded pages: one sub-directory of .html files per handle")
+    source.add_argument("--archive", default=archive.ARCHIVE_DIR,
+                        help="Build timelines from the tweet archive (default data/)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, help="Seed latency and error injection for repeatable runs")
+    parser.add_argument("--rebase-dates", action="store_true",
+                        help="Shift dates so the newest tweet is current (keeps the scraper's cutoff happy)")
+    args = parser.parse_args()
+
+    timelines = load_recorded_pages(args.pages) if args.pages else load_archive(args.archive)
+    if args.rebase_dates:
+        rebase_dates(timelines)
+    server = NitterStub((args.host, args.port), timelines, args.page_size, args.latency, args.jitter,
+                        args.error_rate, args.error_status, args.seed)
+    print(f"Serving {sum(map(len, timelines.values()))} tweets for {len(timelines)} handles at {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,78 @@
+"""Staged worker pipeline connected by bounded queues.
+
+Each stage runs in its own thread and turns one input item into zero or more
+output items. Queues between stages hold at most ``PIPELINE_QUEUE_SIZE``
+items, so a slow stage blocks the ones feeding it (back-pressure) and memory
+stays bounded no matter how much input flows through.
+"""
+import os
+import queue
+import threading
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "64"))
+
+_DONE = object()
+
+
+class Pipeline:
+    """``put()`` items in; they flow through ``stages`` in order.
+
+    ``stages`` is a list of (name, fn) or (name, fn, maxsize) where ``fn(item)``
+    returns an iterable of outputs (or None) and ``maxsize`` bounds that stage's
+    input queue. The last stage is the sink. The first exception raised by any
+    stage is re-raised from ``put()`` or ``close()``.
+    """
+
+    def __init__(self, stages, maxsize=PIPELINE_QUEUE_SIZE):
+        self.queues = [queue.Queue(stage[2] if len(stage) > 2 else maxsize) for stage in stages]
+        self.error = None
+        self.threads = []
+        for i, (name, fn, *_) in enumerate(stages):
+            out_q = self.queues[i + 1] if i + 1 < len(stages) else None
+            t = threading.Thread(target=self._run, args=(fn, self.queues[i], out_q),
+                                 name=f"pipeline-{name}", daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def _run(self, fn, in_q, out_q):
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                if out_q is not None:
+                    out_q.put(_DONE)
+                return
+            if self.error is not None:
+                continue  # drain so upstream never blocks forever
+            try:
+                for out in fn(item) or ():
+                    if out_q is not None:
+                        out_q.put(out)
+            except Exception as e:
+                self.error = e
+
+    def put(self, item):
+        """Feed one item; blocks while the first stage is saturated."""
+        if self.error is not None:
+            raise self.error
+        self.queues[0].put(item)
+
+    def close(self):
+        """Signal end of input, wait for every stage to drain and re-raise failures."""
+        self.queues[0].put(_DONE)
+        for t in self.threads:
+            t.join()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.error = self.error or exc
+            self.queues[0].put(_DONE)
+            for t in self.threads:
+                t.join()
+        return False
@@ -0,0 +1,290 @@
+"""Per-handle polling schedule for the long-running scraper (``main.py serve``).
+
+Each handle keeps its own interval. Its posting rate (new tweets per hour) is
+first learned from the archive in ``data/`` via the timestamps encoded in tweet
+ids, then re-estimated after every poll as an exponentially weighted average.
+The next interval is the time it should take to accumulate
+``SERVE_TARGET_PER_POLL`` new tweets, clamped to
+[``SERVE_MIN_INTERVAL``, ``SERVE_MAX_INTERVAL``], and doubled for every poll in
+a row that found nothing (exponential backoff for quiet accounts). Each poll is
+also given a page budget sized to the tweets expected since the last one, scaled
+by the handle's timeline items per kept tweet: retweets and tweets the gates
+drop take up page slots too.
+
+One-shot runs (``main.py``) use ``WorkQueue`` instead: handles are ordered by
+expected yield (posting rate x hours since they were last fully scraped) and
+each gets a share of ``RUN_TIME_BUDGET``. Handles the run could not finish are
+recorded in ``RUN_STATE_FILE`` and, being staler, come first next time.
+"""
+import heapq
+import math
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import archive
+import codec
+
+SERVE_MIN_INTERVAL = float(os.getenv("SERVE_MIN_INTERVAL", "300"))
+SERVE_MAX_INTERVAL = float(os.getenv("SERVE_MAX_INTERVAL", "21600"))
+SERVE_INITIAL_INTERVAL = float(os.getenv("SERVE_INITIAL_INTERVAL", "1800"))
+SERVE_TARGET_PER_POLL = float(os.getenv("SERVE_TARGET_PER_POLL", "5"))
+# Days of archive used to learn each handle's posting rate.
+RATE_HISTORY_DAYS = float(os.getenv("RATE_HISTORY_DAYS", "14"))
+# Weight of the newest observation in the posting-rate average.
+RATE_SMOOTHING = 0.3
+BACKOFF_FACTOR = 2
+# Tweets on one Nitter timeline page, and how many more pages than expected a
+# poll may load before giving up, so bursts are still captured in full.
+TWEETS_PER_PAGE = 20
+PAGE_BUDGET_SLACK = 2
+# Timeline items per kept tweet assumed until a handle's polls have measured
+# it. Retweets alone are about a sixth of the archive, and the gates drop more.
+TIMELINE_RATIO_PRIOR = float(os.getenv("TIMELINE_RATIO_PRIOR", "1.5"))
+
+# Seconds a one-shot run may spend scraping; leaves room under the CI job's
+# `timeout 15m` for browser startup, saving and the store updates.
+RUN_TIME_BUDGET = float(os.getenv("RUN_TIME_BUDGET", "780"))
+HANDLE_MIN_BUDGET = float(os.getenv("HANDLE_MIN_BUDGET", "60"))
+HANDLE_MAX_BUDGET = float(os.getenv("HANDLE_MAX_BUDGET", "600"))
+# Lives in data/ so the workflow commits it and the next run can read it.
+RUN_STATE_FILE = os.getenv("RUN_STATE_FILE", os.path.join(archive.ARCHIVE_DIR, "run_state.json"))
+# Most handles stop well before their budget (nothing recent left), so shares
+# are over-committed by this factor; the top handles get room to finish.
+BUDGET_OVERCOMMIT = 2
+# Tweets/hour assumed for handles with no history, so they still get scraped.
+QUIET_RATE_FLOOR = 0.05
+# Staleness assumed for a handle that was never scraped (the scrape window).
+NEVER_SCRAPED_HOURS = 48
+
+
+def learn_posting_rates(handles, reader=None, days=RATE_HISTORY_DAYS):
+    """{handle: tweets per hour} over the last ``days`` of the archive.
+
+    The window ends at the newest archived tweet rather than now, so a stale
+    archive still yields sensible rates. Handles without tweets get 0.0.
+    """
+    reader = reader or archive.ArchiveReader()
+    wanted = {archive.normalize_handle(h): h for h in handles}
+    posted = {}  # tweet id -> (handle, time)
+    for tweet in reader.iter_tweets():
+        handle = wanted.get(archive.normalize_handle(tweet.get("user", "")))
+        when = archive.snowflake_time(tweet.get("id"))
+        if handle is not None and when is not None:
+            posted[str(tweet["id"])] = (handle, when)
+    rates = {h: 0.0 for h in handles}
+    if not posted:
+        return rates
+    end = max(when for _, when in posted.values())
+    start = end - timedelta(days=days)
+    counts = Counter(handle for handle, when in posted.values() if when >= start)
+    for handle, n in counts.items():
+        rates[handle] = n / (days * 24)
+    return rates
+
+
+class HandleState:
+    def __init__(self, handle, interval, due, rate=None):
+        self.handle = handle
+        self.interval = interval
+        self.due = due
+        self.rate = rate  # new tweets per hour
+        self.timeline_ratio = None  # recent timeline items per kept tweet
+        self.last_poll = None
+        self.empty_polls = 0  # consecutive polls that found nothing
+        self.polls = 0
+        self.tweets = 0
+
+
+class Scheduler:
+    """Hands out the handle that is due next and adapts intervals from poll results."""
+
+    def __init__(self, handles, rates=None, initial_interval=SERVE_INITIAL_INTERVAL,
+                 min_interval=SERVE_MIN_INTERVAL, max_interval=SERVE_MAX_INTERVAL,
+                 target_per_poll=SERVE_TARGET_PER_POLL, now=None):
+        now = time.time() if now is None else now
+        rates = rates or {}
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_per_poll = target_per_poll
+        # Everything is due immediately; spread by position so the first round
+        # keeps the configured handle order.
+        self.states = {}
+        for i, handle in enumerate(handles):
+            state = HandleState(handle, initial_interval, now + i * 1e-3, rates.get(handle))
+            state.interval = self._interval(state)
+            self.states[handle] = state
+
+    def next(self, now=None):
+        """(handle, seconds until it is due); 0 or less means poll it now."""
+        now = time.time() if now is None else now
+        state = min(self.states.values(), key=lambda s: s.due)
+        return state.handle, state.due - now
+
+    def page_budget(self, handle, window=None, now=None):
+        """Most pages the next poll of ``handle`` should load.
+
+        Sized from the tweets expected over ``window`` seconds (default: since
+        the last poll) times the timeline items per kept tweet, plus
+        ``PAGE_BUDGET_SLACK`` pages. None means no limit, which is what a handle
+        gets until its rate is known.
+        """
+        now = time.time() if now is None else now
+        state = self.states[handle]
+        if window is None and state.last_poll is not None:
+            window = now - state.last_poll
+        if state.rate is None or window is None:
+            return None
+        expected = state.rate * window / 3600 * (state.timeline_ratio or TIMELINE_RATIO_PRIOR)
+        return math.ceil(expected / TWEETS_PER_PAGE) + PAGE_BUDGET_SLACK
+
+    def record(self, handle, new_tweets, window=None, now=None, timeline_items=None):
+        """Update ``handle`` after a poll that found ``new_tweets`` and reschedule it.
+
+        ``window`` is the span in seconds the poll covered; it defaults to the
+        time since the previous poll (the first poll of a handle must pass it).
+        ``timeline_items`` is how many recent items the poll went through,
+        including the ones it did not keep.
+        """
+        now = time.time() if now is None else now
+        state = self.states[handle]
+        if window is None and state.last_poll is not None:
+            window = now - state.last_poll
+        if window:
+            observed = new_tweets / (max(window, 1.0) / 3600)
+            state.rate = observed if state.rate is None else (
+                RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.rate)
+        if timeline_items and new_tweets:
+            observed = max(timeline_items / new_tweets, 1.0)
+            state.timeline_ratio = observed if state.timeline_ratio is None else (
+                RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.timeline_ratio)
+        state.empty_polls = 0 if new_tweets else state.empty_polls + 1
+        state.last_poll = now
+        state.polls += 1
+        state.tweets += new_tweets
+        state.interval = self._interval(state)
+        state.due = now + state.interval
+        return state.interval
+
+    def _interval(self, state):
+        if state.rate is None:
+            base = self.initial_interval
+        elif state.rate == 0:
+            base = self.max_interval  # nothing in the archive or since: as rarely as allowed
+        else:
+            base = self.target_per_poll / state.rate * 3600
+        seconds = max(base, self.min_interval) * BACKOFF_FACTOR ** state.empty_polls
+        return min(seconds, self.max_interval)
+
+
+# ----------------------------
+# One-shot runs: prioritised work queue
+# ----------------------------
+def load_run_state(path=RUN_STATE_FILE):
+    if not os.path.exists(path):
+        return {"handles": {}}
+    return codec.read_json(path)
+
+
+def save_run_state(state, path=RUN_STATE_FILE):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    codec.write_json(state, path)
+
+
+class WorkQueue:
+    """Handles in order of expected yield, each with a time budget, within one run budget.
+
+    Iterating yields (handle, seconds); call ``done()`` after each handle. The
+    budget is the handle's share of the time left, in proportion to its
+    priority among the handles still queued (times ``BUDGET_OVERCOMMIT``), clamped to
+    [``HANDLE_MIN_BUDGET``, ``HANDLE_MAX_BUDGET``], so time a handle does not
+    use flows to the ones after it. Iteration stops once less than
+    ``HANDLE_MIN_BUDGET`` remains.
+    """
+
+    def __init__(self, handles, rates=None, state=None, run_budget=RUN_TIME_BUDGET, now=None):
+        self.now = now or datetime.now(timezone.utc)
+        self.deadline = time.time() + run_budget
+        self.state = state if state is not None else {"handles": {}}
+        self.state.setdefault("handles", {})
+        rates = rates or {}
+        self.priorities = {h: self._priority(h, rates.get(h) or 0.0) for h in handles}
+        # heapq is a min-heap; the position breaks ties in configured order.
+        self._heap = [(-p, i, h) for i, (h, p) in enumerate(self.priorities.items())]
+        heapq.heapify(self._heap)
+        self.unfinished = []
+
+    def _priority(self, handle, rate):
+        """Expected new tweets: posting rate x hours since the last complete scrape."""
+        last = self.state["handles"].get(handle, {}).get("last_complete")
+        if last:
+            hours = (self.now - datetime.fromisoformat(last)).total_seconds() / 3600
+        else:
+            hours = NEVER_SCRAPED_HOURS
+        return max(rate, QUIET_RATE_FLOOR) * max(hours, 0.0)
+
+    def __iter__(self):
+        while self._heap:
+            remaining = self.deadline - time.time()
+            if remaining < HANDLE_MIN_BUDGET:
+                return
+            _, _, handle = heapq.heappop(self._heap)
+            queued = self.priorities[handle] + sum(-p for p, _, _ in self._heap)
+            share = remaining * BUDGET_OVERCOMMIT * self.priorities[handle] / queued if queued else remaining
+            yield handle, min(max(share, HANDLE_MIN_BUDGET), HANDLE_MAX_BUDGET, remaining)
+
+    def skip(self, handles):
+        """Leave ``handles`` out of this run, e.g. ones an interrupted run already finished."""
+        handles = set(handles)
+        self._heap = [entry for entry in self._heap if entry[2] not in handles]
+        heapq.heapify(self._heap)
+
+    def done(self, handle, count, finished):
+        """Record a handle's outcome; unfinished handles keep their old ``last_complete``."""
+        record = self.state["handles"].setdefault(handle, {})
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        record["last_attempt"] = stamp
+        record["last_count"] = count
+        if finished:
+            record["last_complete"] = stamp
+        else:
+            self.unfinished.append(handle)
+
+    def leftovers(self):
+        """Handles the run never got to, highest priority first."""
+        return [h for _, _, h in sorted(self._heap)]
+
+    def finish(self):
+        """Note unfinished and unreached handles in the state; the next run reports them."""
+        self.state["carried_over"] = self.unfinished + self.leftovers()
+        return self.state
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import main
+
+    parser = argparse.ArgumentParser(description="Show learned posting rates and the resulting poll plan.")
+    parser.add_argument("--days", type=float, default=RATE_HISTORY_DAYS)
+    parser.add_argument("--fixed-interval", type=float, default=SERVE_INITIAL_INTERVAL,
+                        help="Interval of the uniform schedule to compare against (seconds)")
+    args = parser.parse_args()
+
+    rates = learn_posting_rates(main.CREATOR_HANDLES, days=args.days)
+    plan = Scheduler(main.CREATOR_HANDLES, rates)
+    adaptive_pages = fixed_pages = 0.0
+    print(f"{'handle':<18} {'tweets/day':>10} {'interval':>9} {'polls/day':>9} {'pages/day':>9}")
+    for handle, state in plan.states.items():
+        polls = 86400 / state.interval
+        pages = polls * plan.page_budget(handle, window=state.interval)
+        fixed = 86400 / args.fixed_interval * plan.page_budget(handle, window=args.fixed_interval)
+        adaptive_pages += pages
+        fixed_pages += fixed
+        print(f"{handle:<18} {state.rate * 24:>10.1f} {state.interval / 60:>7.0f} m {polls:>9.1f} {pages:>9.1f}")
+    print(f"Page loads per day: {adaptive_pages:.0f} adaptive vs {fixed_pages:.0f} "
+          f"polling every handle each {args.fixed_interval / 60:.0f} minutes")
+
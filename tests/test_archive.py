@@ -0,0 +1,43 @@
+import archive
+import codec
+
+
+def write_snapshot(root, name, tweets):
+    codec.write_json(tweets, str(root / name))
+
+
+def tweet(tweet_id, text="$SPY looks strong", user="@trader"):
+    return {"user": user, "text": text, "bias": None, "tickers": ["SPY"], "id": tweet_id}
+
+
+def test_compact_keep_does_not_read_tweets_twice(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_INDEX_DIR", str(tmp_path / "index"))
+    data = tmp_path / "data"
+    data.mkdir()
+    write_snapshot(data, "tweets_with_bias_2025-06-12_10-00-00.json", [tweet("1"), tweet("2")])
+    write_snapshot(data, "tweets_with_bias_2025-06-13_10-00-00.json", [tweet("2"), tweet("3")])
+    write_snapshot(data, "tweets_with_bias_2025-07-01_10-00-00.json", [tweet("4")])
+
+    archive.compact_archive(str(data), keep_sources=True)
+
+    assert (data / "tweets_with_bias_2025-06-12_10-00-00.json").exists()
+    ids = sorted(t["id"] for t in archive.ArchiveReader(str(data)).iter_tweets())
+    assert ids == ["1", "2", "3", "4"]
+
+
+def test_compacted_records_keep_their_source_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_INDEX_DIR", str(tmp_path / "index"))
+    data = tmp_path / "data"
+    data.mkdir()
+    write_snapshot(data, "tweets_with_bias_2025-06-12_10-00-00.json",
+                   [tweet("temp_1_0_1", "first"), tweet("temp_1_1_2", "second")])
+    write_snapshot(data, "tweets_with_bias_2025-06-13_10-00-00.json",
+                   [tweet("temp_1_1_2", "second"), tweet("temp_1_2_3", "third")])
+
+    archive.compact_archive(str(data))
+    archive.compact_archive(str(data))  # re-compacting an existing segment keeps the days
+
+    reader = archive.ArchiveReader(str(data))
+    (index,) = reader.indexes()
+    days = dict(zip((entry[2] for entry in index.entries), reader.record_days(index)))
+    assert days == {"temp_1_0_1": "2025-06-12", "temp_1_1_2": "2025-06-12", "temp_1_2_3": "2025-06-13"}
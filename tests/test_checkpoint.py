@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import checkpoint
+import codec
+
+CUTOFF = datetime(2025, 6, 12, tzinfo=timezone.utc)
+
+
+def interrupted_run(root, age):
+    """A checkpoint left behind ``age`` seconds ago, with one handle done and one tweet."""
+    run, _ = checkpoint.Checkpoint.open("data/tweets_with_bias_old.json", CUTOFF, root=str(root))
+    run.add({"user": "@trader", "text": "$SPY", "id": "1"})
+    run.complete("@trader")
+    run.set_cursor("@other", "?cursor=abc")
+    state = codec.read_json(run.state_path)
+    state["updated"] = time.time() - age
+    codec.write_json(state, run.state_path)
+
+
+def test_checkpoint_from_the_previous_daily_run_is_resumed(tmp_path):
+    interrupted_run(tmp_path, age=timedelta(hours=24).total_seconds())
+
+    run, resumed = checkpoint.Checkpoint.open("data/tweets_with_bias_new.json",
+                                              CUTOFF + timedelta(days=1), root=str(tmp_path))
+
+    assert resumed
+    assert run.output_file == "data/tweets_with_bias_old.json"
+    assert run.cutoff_time == CUTOFF
+    assert run.cursor("@other") == "?cursor=abc"
+    assert run.seen_ids() == {"1"}
+
+
+def test_stale_checkpoint_is_discarded(tmp_path):
+    interrupted_run(tmp_path, age=checkpoint.CHECKPOINT_MAX_AGE + 60)
+
+    run, resumed = checkpoint.Checkpoint.open("data/tweets_with_bias_new.json", CUTOFF, root=str(tmp_path))
+
+    assert not resumed
+    assert run.output_file == "data/tweets_with_bias_new.json"
+    assert run.seen_ids() == set()
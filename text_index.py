@@ -0,0 +1,230 @@
+"""On-disk inverted index over archived tweet text.
+
+Maps token -> tweets in a SQLite file (``TEXT_INDEX_DB``), built incrementally
+from the archive. Matching follows ``detect_bias``: a phrase hits a tweet when
+it is a substring of the lowercased text, so "moon" also finds "mooning" and
+"ai" finds "said". Every word of a phrase then lies inside a single token of
+the tweet, so a query collects the tweets of the indexed tokens containing the
+phrase's most selective word, and confirms only those candidates against
+their text.
+"""
+import os
+import re
+import sqlite3
+
+import aggregates
+import archive
+import codec
+
+TEXT_INDEX_DB = os.getenv("TEXT_INDEX_DB", ".cache/text_index.sqlite")
+SCHEMA_VERSION = 2
+
+# Words (keeping inner apostrophes, e.g. "don't") and every other non-space
+# character as its own token, so "$tsla", "p/e" and emoji phrases are searchable.
+TOKEN_REGEX = re.compile(r"\w+(?:['’]\w+)*|[^\w\s]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc  INTEGER PRIMARY KEY,
+    key  TEXT NOT NULL UNIQUE,
+    id   TEXT,
+    user TEXT,
+    bias TEXT,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc   INTEGER NOT NULL,
+    PRIMARY KEY (token, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    df    INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingested_files (name TEXT PRIMARY KEY, stamp TEXT NOT NULL);
+"""
+
+
+def tokenize(text):
+    return TOKEN_REGEX.findall((text or "").lower().replace("’", "'"))
+
+
+class TextIndex:
+    """Token -> tweets inverted index."""
+
+    def __init__(self, path=TEXT_INDEX_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Older layout: rebuild from the archive on the next update().
+            for (table,) in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall():
+                self.conn.execute(f"DROP TABLE {table}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+        self._vocabulary = None
+
+    def close(self):
+        self.conn.close()
+
+    # ---------- building ----------
+    def _add_doc(self, cur, tweet):
+        key = aggregates.tweet_key(tweet.get("id"), tweet["user"], tweet["text"])
+        cur.execute(
+            "INSERT OR IGNORE INTO docs (key, id, user, bias, text) VALUES (?, ?, ?, ?, ?)",
+            (key, tweet.get("id"), tweet["user"], tweet.get("bias") or "None", tweet["text"]),
+        )
+        if cur.rowcount == 0:
+            return False
+        doc = cur.lastrowid
+        tokens = set(tokenize(tweet["text"]))
+        cur.executemany("INSERT INTO postings (token, doc) VALUES (?, ?)", ((t, doc) for t in tokens))
+        cur.executemany(
+            "INSERT INTO tokens (token, df) VALUES (?, 1) "
+            "ON CONFLICT (token) DO UPDATE SET df = df + 1",
+            ((token,) for token in tokens),
+        )
+        return True
+
+    def update(self, reader=None):
+        """Index every archive file not seen before. Returns the number of new tweets."""
+        reader = reader or archive.ArchiveReader()
+        known = dict(self.conn.execute("SELECT name, stamp FROM ingested_files"))
+        added = 0
+        with self.conn:  # one transaction for the whole batch
+            cur = self.conn.cursor()
+            for index in reader.indexes():
+                name = os.path.basename(index.path)
+                stamp = "%d-%s" % tuple(archive.file_stamp(index.path))
+                if known.get(name) == stamp:
+                    continue
+                with archive.open_mapped(index.path) as buf:
+                    for start, end, *_ in index.entries:
+                        added += self._add_doc(cur, codec.loads(buf[start:end]))
+                cur.execute(
+                    "INSERT OR REPLACE INTO ingested_files (name, stamp) VALUES (?, ?)", (name, stamp)
+                )
+        self._vocabulary = None
+        return added
+
+    # ---------- queries ----------
+    def vocabulary(self):
+        """{token: number of tweets containing it}, loaded once per query session."""
+        if self._vocabulary is None:
+            self._vocabulary = dict(self.conn.execute("SELECT token, df FROM tokens"))
+            # One token per line: str.find locates every token containing a word.
+            self._vocabulary_text = "\n".join(self._vocabulary)
+            self._containing = {}
+        return self._vocabulary
+
+    def tokens_containing(self, word):
+        """Indexed tokens that contain ``word``, with the number of tweets they cover."""
+        vocabulary = self.vocabulary()
+        if word not in self._containing:
+            text, tokens, pos = self._vocabulary_text, [], 0
+            while True:
+                pos = text.find(word, pos)
+                if pos < 0:
+                    break
+                start = text.rfind("\n", 0, pos) + 1
+                end = text.find("\n", pos)
+                end = len(text) if end < 0 else end
+                tokens.append(text[start:end])
+                pos = end  # next line
+            self._containing[word] = (sum(vocabulary[t] for t in tokens), tokens)
+        return self._containing[word]
+
+    def candidate_docs(self, phrase):
+        """Doc numbers that may contain ``phrase``: a superset of ``phrase_docs``.
+
+        Uses the phrase word whose containing tokens cover the fewest tweets.
+        """
+        best = None
+        for word in set(tokenize(phrase)):
+            df, tokens = self.tokens_containing(word)
+            if best is None or df < best[0]:
+                best = (df, tokens)
+        if best is None:
+            return set()
+        docs = set()
+        for token in best[1]:
+            docs.update(doc for (doc,) in self.conn.execute(
+                "SELECT doc FROM postings WHERE token = ?", (token,)))
+        return docs
+
+    def phrase_docs(self, phrase):
+        """Doc numbers whose text contains ``phrase``, by the same test as ``detect_bias``."""
+        needle = (phrase or "").lower()
+        if not needle.strip():
+            return set()
+        candidates = list(self.candidate_docs(phrase))
+        hits = set()
+        for i in range(0, len(candidates), 500):
+            chunk = candidates[i:i + 500]
+            for doc, text in self.conn.execute(
+                "SELECT doc, text FROM docs WHERE doc IN (%s)" % ",".join("?" * len(chunk)), chunk,
+            ):
+                if needle in (text or "").lower():
+                    hits.add(doc)
+        return hits
+
+    def docs(self, doc_ids):
+        """Rows of (id, user, bias, text) for the given doc numbers."""
+        rows = []
+        doc_ids = list(doc_ids)
+        for i in range(0, len(doc_ids), 500):
+            chunk = doc_ids[i:i + 500]
+            rows.extend(self.conn.execute(
+                "SELECT id, user, bias, text FROM docs WHERE doc IN (%s) ORDER BY doc"
+                % ",".join("?" * len(chunk)), chunk,
+            ))
+        return rows
+
+    def search(self, phrase):
+        """Tweets containing ``phrase``: [(id, user, bias, text)]."""
+        return self.docs(self.phrase_docs(phrase))
+
+    def lexicon_impact(self, phrases):
+        """For each phrase: (total hits, hits on tweets currently labelled "None")."""
+        impact = {}
+        for phrase in phrases:
+            docs = self.phrase_docs(phrase)
+            unlabelled = 0
+            if docs:
+                unlabelled = sum(1 for _id, _user, bias, _text in self.docs(docs) if bias == "None")
+            impact[phrase] = (len(docs), unlabelled)
+        return impact
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and query the tweet text index.")
+    parser.add_argument("command", choices=["update", "search", "impact"])
+    parser.add_argument("phrases", nargs="*")
+    parser.add_argument("--db", default=TEXT_INDEX_DB)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_intermixed_args()
+
+    text_index = TextIndex(args.db)
+    if args.command == "update":
+        print(f"Indexed {text_index.update()} new tweets into {args.db}")
+    elif args.command == "search":
+        rows = text_index.search(" ".join(args.phrases))
+        for tweet_id, user, bias, text in rows[:args.limit]:
+            print(f"{tweet_id}\t{user}\t{bias}\t{text[:80]!r}")
+        print(f"{len(rows)} matching tweets")
+    else:
+        # Without explicit phrases, report on every key in classifiers.CLASSIFIERS.
+        if args.phrases:
+            phrases = args.phrases
+        else:
+            from classifiers import CLASSIFIERS
+            phrases = list(CLASSIFIERS)
+        for phrase, (hits, unlabelled) in text_index.lexicon_impact(phrases).items():
+            if hits or args.phrases:
+                print(f"{phrase!r:<40} {hits:>6} hits  {unlabelled:>6} currently unlabelled")
+    text_index.close()
@@ -0,0 +1,61 @@
+"""Ticker extraction against a validated, frozen symbol universe.
+
+The universe is loaded once from ``TICKER_UNIVERSE_FILE`` (CSV with columns
+symbol,type,ambiguous) plus any symbols in ``TICKER_UNIVERSE_APPEND``. One
+regex pass finds candidate words; each is accepted only if it is in the
+universe. Symbols flagged ambiguous (common words such as NOW, ON or AI) only
+count as cashtags, and crypto symbols also match in lowercase ("btc").
+"""
+import csv
+import os
+import re
+
+TICKER_UNIVERSE_FILE = os.getenv(
+    "TICKER_UNIVERSE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbols.csv"),
+)
+
+# Optional "$" followed by 1-6 letters, not glued to other letters/digits.
+CANDIDATE_REGEX = re.compile(r"(?<![A-Za-z0-9$])(\$?)([A-Za-z]{1,6})(?![A-Za-z0-9])")
+
+
+def load_universe(path=TICKER_UNIVERSE_FILE):
+    """Return (all symbols, symbols usable without "$", crypto symbols) as frozensets."""
+    symbols, bare_ok, crypto = set(), set(), set()
+    if os.path.exists(path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                symbol = row["symbol"].strip().upper()
+                if not symbol:
+                    continue
+                symbols.add(symbol)
+                if row.get("ambiguous", "0").strip() not in ("1", "true"):
+                    bare_ok.add(symbol)
+                    if row.get("type", "").strip() == "crypto":
+                        crypto.add(symbol)
+    else:
+        print(f"Ticker universe {path} not found; only TICKER_UNIVERSE_APPEND symbols are recognised")
+    appended = {
+        s.strip().lstrip("$").upper()
+        for s in os.getenv("TICKER_UNIVERSE_APPEND", "").split(",")
+        if s.strip()
+    }
+    symbols |= appended
+    bare_ok |= appended
+    return frozenset(symbols), frozenset(bare_ok), frozenset(crypto)
+
+
+SYMBOLS, BARE_SYMBOLS, CRYPTO_SYMBOLS = load_universe()
+
+
+def extract_tickers(text: str):
+    """Validated tickers in order of first appearance, e.g. ["TSLA", "BTC"]."""
+    found = []
+    for m in CANDIDATE_REGEX.finditer(text or ""):
+        cashtag, word = m.groups()
+        symbol = word.upper()
+        if symbol not in SYMBOLS or symbol in found:
+            continue
+        if cashtag or (word.isupper() and symbol in BARE_SYMBOLS) or symbol in CRYPTO_SYMBOLS:
+            found.append(symbol)
+    return found